@@ -178,8 +178,8 @@ async def execute(args: Dict[str, Any], context: Dict[str, Any]) -> str:
             if comment_blocks:
                 info.append(f"\n文档注释 ({len(comment_blocks)}):")
                 for i, comment in enumerate(comment_blocks[:5], 1):
-                    lines_preview = "\n".join(comment.split("\n")[:3])
-                    if len(comment.split("\n")) > 3:
+                    lines_preview = "\n".join(comment.split("\n", 3)[:3])
+                    if comment.count("\n") >= 3:
                         lines_preview += "..."
                     info.append(f"  {i}. {lines_preview}")
                 if len(comment_blocks) > 5:
@@ -18,6 +18,22 @@ from system.config import config
 
 logger = logging.getLogger(__name__)
 
+# 当日日志文件路径缓存：日期不变时跳过 makedirs / strftime / join
+_LOG_DAY: Optional[datetime.date] = None
+_LOG_PATH: Optional[str] = None
+
+
+def _get_log_path() -> str:
+    """返回当日 chat_logs 文件路径，仅在跨天时重新创建目录并生成文件名。"""
+    global _LOG_DAY, _LOG_PATH
+    today = datetime.date.today()
+    if today != _LOG_DAY or _LOG_PATH is None:
+        logs_dir = os.path.join(str(config.system.log_dir), "chat_logs")
+        os.makedirs(logs_dir, exist_ok=True)
+        _LOG_PATH = os.path.join(logs_dir, today.strftime("chat_logs_%Y_%m_%d.txt"))
+        _LOG_DAY = today
+    return _LOG_PATH
+
 
 def write_chat_log(text: str, timestamp: Optional[str] = None) -> None:
     """将单条对话追加到 chat_logs 目录。
@@ -27,10 +43,7 @@ def write_chat_log(text: str, timestamp: Optional[str] = None) -> None:
         timestamp: 可选的 ISO 时间戳；为空时使用当前时间。
     """
     try:
-        logs_dir = os.path.join(str(config.system.log_dir), "chat_logs")
-        os.makedirs(logs_dir, exist_ok=True)
-        filename = datetime.datetime.now().strftime("chat_logs_%Y_%m_%d.txt")
-        path = os.path.join(logs_dir, filename)
+        path = _get_log_path()
 
         if timestamp is None:
             ts = datetime.datetime.now().strftime("%H:%M:%S")
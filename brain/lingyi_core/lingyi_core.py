@@ -42,6 +42,9 @@ TOOL_CALL_TTL = 3
 BATCH_MIN_WAIT = 2.0  # 首条消息后至少等待秒数
 BATCH_MAX_WAIT = 5.0  # 首条消息后最多等待秒数
 
+# 触发记忆搜索的最短文本长度（过短且无关键词时跳过，避免无意义的 LLM/embedding 调用）
+MIN_MEMORY_QUERY_CHARS = 3
+
 # 流式文本句子分隔符
 _SENTENCE_DELIMITERS = re.compile(r'[。！？.!?\n；;]')
 
@@ -78,6 +81,8 @@ class LingYiCore:
     """AI 模型客户端 — 自主协调器"""
 
     def __init__(self, main_prompt: str) -> None:
+        # 核心人格提示词只在启动时读取一次，之后切换模块提示词直接复用
+        self._core_prompt = self._load_core_prompt()
         self.main_prompt = self._compose_main_prompt(main_prompt)
         self._kg_manager = get_knowledge_graph_manager()
         self._memory_writers: dict[str, MemoryWriter] = {}
@@ -136,7 +141,7 @@ class LingYiCore:
 
     def _compose_main_prompt(self, module_prompt: str) -> str:
         """拼接核心人格提示词与调用方模块提示词。"""
-        core_prompt = self._load_core_prompt()
+        core_prompt = self._core_prompt
         extra_prompt = (module_prompt or "").strip()
 
         if core_prompt and extra_prompt:
@@ -379,13 +384,16 @@ class LingYiCore:
                         except Exception:
                             pass
 
-                    # 立即搜索长期记忆：每次收到新消息即触发一次记忆搜索
-                    if is_neo4j_available():
+                    # 立即搜索长期记忆：每次收到新消息即触发一次记忆搜索（空消息/过短消息且无关键词时跳过）
+                    search_text = "\n".join(new_messages).strip()
+                    search_keywords = []
+                    for msg in incoming:
+                        search_keywords.extend(msg.get("key_words", []) or [])
+                    if (
+                        (len(search_text) >= MIN_MEMORY_QUERY_CHARS or search_keywords)
+                        and is_neo4j_available()
+                    ):
                         try:
-                            search_text = "\n".join(new_messages)
-                            search_keywords = []
-                            for msg in incoming:
-                                search_keywords.extend(msg.get("key_words", []) or [])
                             formatted_memory = get_formatted_memory_graph(
                                 search_text,
                                 add_keywords=search_keywords or None,
@@ -719,4 +727,9 @@ class LingYiCore:
         for session_key, session_state in list(self._session_states.items()):
             session_state.cancel_idle_flush()
             memory_writer = self._get_memory_writer(session_key)
-            await session_state.flush_pending_memory(memory_writer)
\ No newline at end of file
+            await session_state.flush_pending_memory(memory_writer)
+        # 写回缓冲中尚未落库的记忆调用标记
+        try:
+            await asyncio.to_thread(self._kg_manager.flush_memory_used, retry_on_failure=False)
+        except Exception as e:
+            logger.warning(f"[记忆刷新] 记忆调用标记写入失败: {e}")
\ No newline at end of file
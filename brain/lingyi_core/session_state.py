@@ -272,10 +272,12 @@ class MemoryBatchBuffer:
 
     @staticmethod
     def _dedupe_keywords(keywords: list[str]) -> list[str]:
+        seen: set[str] = set()
         ordered: list[str] = []
         for kw in keywords:
             token = str(kw or "").strip()
-            if token and token not in ordered:
+            if token and token not in seen:
+                seen.add(token)
                 ordered.append(token)
         return ordered
 
@@ -11,11 +11,18 @@
 
 import os
 import re
+import atexit
 import sys
 import json
 import logging
+import threading
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import asdict
 from datetime import datetime
+from functools import lru_cache
 
 # 获取项目根目录
 project_root = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -62,6 +69,115 @@ def load_prompt_file(filename: str, description: str = "") -> str:
 
 MEMORY_RECORD_PROMPT = load_prompt_file("memory_record.txt", "记忆存储")
 
+# 关系谓词中需要替换为下划线的字符（一次 translate 完成，替代多次 replace）
+_PREDICATE_SEPARATOR_TABLE = str.maketrans({" ": "_", "-": "_"})
+# 校验关系类型时忽略下划线
+_PREDICATE_UNDERSCORE_TABLE = str.maketrans("", "", "_")
+
+
+@lru_cache(maxsize=1024)
+def _sanitize_predicate(predicate: str) -> str:
+    """将关系谓词转换为合法的Neo4j关系类型名称，非法时回退到通用关系类型 CONNECTED_TO"""
+    predicate_safe = predicate.translate(_PREDICATE_SEPARATOR_TABLE).upper()
+    if not predicate_safe.translate(_PREDICATE_UNDERSCORE_TABLE).isalnum():
+        return "CONNECTED_TO"
+    return predicate_safe
+
+
+# 单条语句完成：验证节点存在 → 检测同位置同名关系 → 不存在时创建正向（及反向）关系。
+# 关系类型通过 apoc.create.relationship 以参数传入，所有类型共用同一条查询文本与执行计划
+_CREATE_RELATION_QUERY = """
+OPTIONAL MATCH (a) WHERE elementId(a) = $startNode_id
+OPTIONAL MATCH (b) WHERE elementId(b) = $endNode_id
+OPTIONAL MATCH (a)-[existing]->(b) WHERE existing.predicate = $predicate
+WITH a, b, collect(existing)[0] AS existing
+CALL {
+    WITH a, b, existing
+    WITH a, b, existing
+    WHERE a IS NOT NULL AND b IS NOT NULL AND existing IS NULL
+    CALL apoc.create.relationship(a, $rel_type, $props, b) YIELD rel
+    CALL {
+        WITH a, b
+        WITH a, b
+        WHERE $bidirectional
+        CALL apoc.create.relationship(b, $rel_type, $props, a) YIELD rel AS back
+        RETURN count(back) AS back_count
+    }
+    RETURN elementId(rel) AS created_id
+    UNION ALL
+    WITH a, b, existing
+    WITH a, b, existing
+    WHERE a IS NULL OR b IS NULL OR existing IS NOT NULL
+    RETURN null AS created_id
+}
+RETURN a IS NOT NULL as a_exists, b IS NOT NULL as b_exists,
+       a.name as a_name, b.name as b_name,
+       elementId(existing) as existing_relation_id,
+       created_id as relationship_id
+"""
+
+
+# 批量创建关系的 UNWIND 语句，语义同 _CREATE_RELATION_QUERY。
+# 关系类型通过 apoc.create.relationship 以参数传入，不同类型的关系共用同一条查询文本与执行计划，
+# 一批数据只需一条语句，无需按类型拆分
+_BULK_CREATE_RELATIONS_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (a) WHERE elementId(a) = row.start_id
+OPTIONAL MATCH (b) WHERE elementId(b) = row.end_id
+OPTIONAL MATCH (a)-[existing]->(b) WHERE existing.predicate = row.predicate
+WITH row, a, b, collect(existing)[0] AS existing
+CALL {
+    WITH row, a, b, existing
+    WITH row, a, b, existing
+    WHERE a IS NOT NULL AND b IS NOT NULL AND existing IS NULL
+    CALL apoc.create.relationship(a, row.rel_type, row.props, b) YIELD rel
+    CALL {
+        WITH row, a, b
+        WITH row, a, b
+        WHERE row.bidirectional
+        CALL apoc.create.relationship(b, row.rel_type, row.props, a) YIELD rel AS back
+        RETURN count(back) AS back_count
+    }
+    RETURN elementId(rel) AS created_id
+    UNION ALL
+    WITH row, a, b, existing
+    WITH row, a, b, existing
+    WHERE a IS NULL OR b IS NULL OR existing IS NOT NULL
+    RETURN null AS created_id
+}
+RETURN row.idx AS idx,
+       a IS NOT NULL AND b IS NOT NULL AS nodes_exist,
+       elementId(existing) AS existing_relation_id,
+       created_id
+"""
+
+
+# 可直接拼接进 Cypher 的属性名：字母（含中文）或下划线开头，其后为字母、数字或下划线
+_is_safe_property_name = re.compile(r"[^\W\d]\w*").fullmatch
+
+# 时间组件字符串的分隔符（兼容中英文逗号）
+_TIME_COMPONENT_SPLIT_RE = re.compile(r'\s*[,，]\s*')
+
+
+def _split_time_components(value) -> list[str]:
+    """将 "2001年, 02月, 03日" 形式的时间字符串一次扫描拆分为组件列表；列表原样返回。"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part for part in _TIME_COMPONENT_SPLIT_RE.split(value.strip()) if part]
+    return value
+
+
+# 可选依赖：优先使用 orjson 序列化（C 实现，直接输出 UTF-8 bytes）；indent=True 时输出两空格缩进
+try:
+    import orjson
+
+    def _json_dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+except ImportError:
+    def _json_dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
 
 try:
     from neo4j import GraphDatabase
@@ -82,9 +198,30 @@ logging.getLogger("neo4j").setLevel(logging.WARNING)
 class KnowledgeGraphManager:
     """知识图谱管理器"""
 
+    # 记忆调用标记的写回延迟（秒）：窗口内的标记合并为一次批量写入
+    MEMORY_USED_FLUSH_DELAY = 5.0
+
+    # 写回失败后的重试间隔上限（秒）：每次失败间隔翻倍，直到此上限
+    MEMORY_USED_RETRY_MAX_DELAY = 300.0
+
+    # 进程内时间节点缓存容量：(时间组件, time_type, context) -> 最具体时间节点ID
+    TIME_NODE_CACHE_SIZE = 1024
+
+    # 进程内命名节点缓存容量：(node_type, name, context) -> 节点ID（供 ensure_node_exists 复用）
+    NAMED_NODE_CACHE_SIZE = 1024
+
     def __init__(self):
         self.driver = None
         self.connected = False
+        self._time_node_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._named_node_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        # 两个节点缓存会被工具线程、定时器线程与失效操作并发访问，所有读写均在此锁内进行
+        self._node_cache_lock = threading.Lock()
+        # note_memory_used 的写回缓冲（检索路径不等待 Neo4j 写入）
+        self._pending_used_relations: set[str] = set()
+        self._pending_used_lock = threading.Lock()
+        self._pending_used_timer: Optional[threading.Timer] = None
+        self._pending_used_retry_delay = self.MEMORY_USED_FLUSH_DELAY
         self._connect()
 
     def _connect(self) -> bool:
@@ -114,9 +251,11 @@ class KnowledgeGraphManager:
                 uri,
                 auth=(user, password),
                 database=database,
-                max_connection_lifetime=30 * 60,  # 30 minutes
-                max_connection_pool_size=50,
-                connection_acquisition_timeout=10,  # 10 seconds
+                max_connection_lifetime=config.grag.neo4j_max_lifetime,
+                max_connection_pool_size=config.grag.neo4j_max_pool_size,
+                connection_acquisition_timeout=config.grag.neo4j_acquisition_timeout,
+                max_transaction_retry_time=config.grag.neo4j_max_transaction_retry_time,
+                keep_alive=True,
                 connection_timeout=5,  # 5 seconds
             )
 
@@ -127,7 +266,8 @@ class KnowledgeGraphManager:
                 if test_value == 1:
                     self.connected = True
                     logger.info("Successfully connected to Neo4j")
-                    # 确保向量索引已创建
+                    # 确保属性索引与向量索引已创建
+                    self._ensure_schema_indexes()
                     self._ensure_vector_indexes()
                     # 每日检查点：快照 + 记忆衰退
                     self.daily_checkpoint()
@@ -145,11 +285,66 @@ class KnowledgeGraphManager:
 
     def disconnect(self):
         """断开数据库连接"""
+        self.flush_memory_used(retry_on_failure=False)
+        self._invalidate_node_caches()
         if self.driver:
             self.driver.close()
             self.connected = False
             logger.info("Disconnected from Neo4j")
 
+    def _invalidate_node_caches(self):
+        """清空进程内的时间节点与命名节点缓存（节点可能被删除、合并或回滚时调用）"""
+        with self._node_cache_lock:
+            self._time_node_cache.clear()
+            self._named_node_cache.clear()
+
+    def _cache_get(self, cache: "OrderedDict[tuple, str]", key: tuple) -> Optional[str]:
+        """加锁读取节点缓存，命中时标记为最近使用"""
+        with self._node_cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: "OrderedDict[tuple, str]", key: tuple, value: str, max_size: int):
+        """加锁写入节点缓存，超出容量时淘汰最久未使用的条目"""
+        with self._node_cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+
+    def _cache_evict(self, cache: "OrderedDict[tuple, str]", key: tuple):
+        """加锁移除节点缓存中的单个条目"""
+        with self._node_cache_lock:
+            cache.pop(key, None)
+
+    @contextmanager
+    def batch(self):
+        """
+        显式事务批处理：with kg_manager.batch() as tx: ... 内的所有写入共用一个事务，
+        正常退出时统一提交一次，出现异常则整体回滚。
+        create_* 系列方法的 session 参数既可传 Session 也可传这里得到的 Transaction。
+        """
+        with self.driver.session() as session:
+            tx = session.begin_transaction()
+            try:
+                yield tx
+                tx.commit()
+            except Exception:
+                tx.rollback()
+                # 回滚的节点不可再被缓存复用
+                self._invalidate_node_caches()
+                raise
+
+    def run_write(self, tx_fn, *args, **kwargs):
+        """
+        在托管写事务中执行 tx_fn(tx, *args, **kwargs)。
+        由驱动负责提交，并在 TransientError（锁冲突、leader 切换等）时自动重试。
+        """
+        with self.driver.session() as session:
+            return session.execute_write(tx_fn, *args, **kwargs)
+
     def _ensure_connection(self) -> bool:
         """确保数据库连接可用"""
         # 首先检查全局连接状态
@@ -160,6 +355,42 @@ class KnowledgeGraphManager:
             return self._connect()
         return True
 
+    # 以 (name, context) 作为查重键的节点标签（同时作为拼接 Cypher 标签时的白名单）
+    NAMED_NODE_LABELS = ("Character", "Location", "Entity")
+
+    # 属性索引定义：(索引名, 标签名, 属性列表)，覆盖节点创建时 MERGE 使用的查重键
+    SCHEMA_INDEX_DEFINITIONS = [
+        ("character_name_context_index", "Character", ["name", "context"]),
+        ("location_name_context_index", "Location", ["name", "context"]),
+        ("entity_name_context_index", "Entity", ["name", "context"]),
+        ("time_str_context_index", "Time", ["time_str", "context"]),
+        # 仅按名称查找（关键词精确匹配）时使用的单属性索引
+        ("character_name_index", "Character", ["name"]),
+        ("location_name_index", "Location", ["name"]),
+        ("entity_name_index", "Entity", ["name"]),
+        ("time_name_index", "Time", ["name"]),
+    ]
+
+    def _ensure_schema_indexes(self):
+        """
+        确保 MERGE/MATCH 查重键上的属性索引已创建，避免按标签全量扫描。
+        使用 IF NOT EXISTS，重复连接时安全；失败不影响连接（例如账号无建索引权限）。
+        """
+        if not self.driver:
+            return
+
+        try:
+            with self.driver.session() as session:
+                for index_name, label, properties in self.SCHEMA_INDEX_DEFINITIONS:
+                    props = ", ".join(f"n.{prop}" for prop in properties)
+                    session.run(
+                        f"CREATE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON ({props})"
+                    ).consume()
+                    logger.debug(f"Ensured index: {index_name} for label :{label}")
+
+        except Exception as e:
+            logger.warning(f"Failed to ensure schema indexes (non-fatal): {e}")
+
     # 向量索引定义：(索引名, 标签名)
     VECTOR_INDEX_DEFINITIONS = [
         ("character_embedding_index", "Character"),
@@ -196,7 +427,7 @@ class KnowledgeGraphManager:
                             f"`vector.similarity_function`: '{self.VECTOR_SIMILARITY_FUNCTION}'"
                             f"}}}}"
                         )
-                        session.run(create_index_query)
+                        session.run(create_index_query).consume()
                         logger.info(f"Created vector index: {index_name} for label :{label}")
                     else:
                         logger.debug(f"Vector index already exists: {index_name}")
@@ -237,6 +468,41 @@ class KnowledgeGraphManager:
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             return None
+
+    def _generate_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        一次接口调用批量生成多条文本的向量
+
+        Args:
+            texts: 要计算向量的文本列表
+
+        Returns:
+            List[Optional[List[float]]]: 与 texts 一一对应的向量，失败（或文本为空）的位置为None
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        valid = [(i, text) for i, text in enumerate(texts) if text and text.strip()]
+        if not valid:
+            return embeddings
+
+        try:
+            logger.debug(f"Generating {len(valid)} embeddings in one request")
+            response = client.embeddings.create(
+                input=[text for _, text in valid],
+                model=MODEL,
+                dimensions=384,
+            )
+
+            if response and response.data:
+                # 按返回的 index 对齐输入顺序
+                for item in response.data:
+                    embeddings[valid[item.index][0]] = item.embedding
+            else:
+                logger.error("Embedding API returned empty response")
+
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings: {e}")
+
+        return embeddings
     
     def create_node(
         self,
@@ -285,77 +551,100 @@ class KnowledgeGraphManager:
         logger.info(f"Creating time node for: {time_str}")
 
         try:
-            most_specific_node_id = None
-            prev_node_name = None
-            prev_cumulative = None
-
-            for i, component in enumerate(time_str):
+            # 逐层计算 name（当前组件文本）与 time_str（从上层到当前层的累积文本，用于embedding）
+            # 累积文本沿层级增量拼接，复用上一层的前缀而不是每层从头 join
+            levels = []
+            cumulative_name = ""
+            for component in time_str:
                 component = component.strip()
                 if not component:
                     continue
+                cumulative_name += component
+                levels.append({"name": component, "time_str": cumulative_name})
+            if not levels:
+                logger.warning(f"No specific node created for time: {time_str}")
+                return None
 
-                # name: 当前组件文本
-                name = component
-                # cumulative_name: 从上层到当前层的累积文本，用于embedding
-                cumulative_name = "".join(c.strip() for c in time_str[:i + 1])
-
-                # 先查询是否已存在相同 time_str+context 的节点且已有 embedding
-                existing = session.run(
-                    """
-                    MATCH (t:Time {time_str: $time_str, context: $context})
-                    RETURN elementId(t) as node_id, t.embedding IS NOT NULL as has_embedding
-                    """,
-                    time_str=cumulative_name,
-                    context=context,
-                ).single()
-
-                if existing and existing["has_embedding"]:
-                    # 节点已存在且有 embedding，直接复用
-                    current_node_id = existing["node_id"]
-                    most_specific_node_id = current_node_id
-                else:
-                    # 节点不存在或缺少 embedding，生成后写入
-                    embedding = self._generate_embedding(cumulative_name)
-
-                    result = session.run(
-                        """
-                        MERGE (t:Time {time_str: $time_str, context: $context})
-                        SET t.name = $name,
-                            t.node_type = 'Time',
-                            t.time_type = $time_type,
-                            t.embedding = $embedding
-                        RETURN elementId(t) as node_id
-                        """,
-                        name=name,
-                        time_str=cumulative_name,
-                        context=context,
-                        time_type=time_type,
-                        embedding=embedding,
-                    )
-                    record = result.single()
-                    if not record:
-                        continue
-
-                    current_node_id = record["node_id"]
-                    most_specific_node_id = current_node_id
-
-                # 创建当前节点到上层节点的 BELONGS_TO 关系
-                if prev_cumulative is not None:
-                    session.run(
-                        """
-                        MATCH (child:Time {time_str: $child_time_str, context: $context})
-                        MATCH (parent:Time {time_str: $parent_time_str, context: $context})
-                        MERGE (child)-[:BELONGS_TO]->(parent)
-                        """,
-                        child_time_str=cumulative_name,
-                        parent_time_str=prev_cumulative,
-                        context=context,
-                    )
+            # 一次查询所有层级是否已存在、已有 embedding 且已挂到上一层
+            time_strs = [lvl["time_str"] for lvl in levels]
+            existing_records = list(session.run(
+                """
+                UNWIND range(0, size($time_strs) - 1) AS i
+                OPTIONAL MATCH (t:Time {time_str: $time_strs[i], context: $context})
+                RETURN $time_strs[i] AS time_str,
+                       elementId(t) AS node_id,
+                       t IS NOT NULL AND t.embedding IS NOT NULL AS has_embedding,
+                       CASE
+                           WHEN t IS NULL THEN false
+                           WHEN i = 0 THEN true
+                           ELSE EXISTS { (t)-[:BELONGS_TO]->(:Time {time_str: $time_strs[i - 1], context: $context}) }
+                       END AS linked
+                """,
+                time_strs=time_strs,
+                context=context,
+            ))
+            has_embedding = {
+                record["time_str"] for record in existing_records if record["has_embedding"]
+            }
 
-                prev_node_name = name
-                prev_cumulative = cumulative_name
+            # 相同时间在对话中反复出现：缓存的节点仍存在且整条层级完整时直接复用，跳过 embedding 与写入。
+            # 时间节点可能已被记忆衰退或其他进程（如可视化服务）删除，且 elementId 会被复用，缓存必须经上面的查询校验
+            cache_key = (tuple(time_strs), time_type, context)
+            cached_node_id = self._cache_get(self._time_node_cache, cache_key)
+            if cached_node_id:
+                complete = {
+                    record["time_str"] for record in existing_records
+                    if record["has_embedding"] and record["linked"]
+                }
+                if all(ts in complete for ts in time_strs) and any(
+                    record["node_id"] == cached_node_id and record["time_str"] == time_strs[-1]
+                    for record in existing_records
+                ):
+                    logger.debug(f"Reused cached time node with ID: {cached_node_id}")
+                    return cached_node_id
+                self._cache_evict(self._time_node_cache, cache_key)
+
+            # 节点不存在或缺少 embedding 的层级，一次接口调用批量生成后随批量写入
+            for idx, lvl in enumerate(levels):
+                lvl["idx"] = idx
+                lvl["reuse"] = lvl["time_str"] in has_embedding
+                lvl["embedding"] = None
+            levels_to_embed = [lvl for lvl in levels if not lvl["reuse"]]
+            if levels_to_embed:
+                embeddings = self._generate_embeddings([lvl["time_str"] for lvl in levels_to_embed])
+                for lvl, embedding in zip(levels_to_embed, embeddings):
+                    lvl["embedding"] = embedding
+
+            # 单条语句 MERGE 所有层级节点，并按顺序建立 child -> parent 的 BELONGS_TO 关系
+            record = session.run(
+                """
+                UNWIND $levels AS lvl
+                MERGE (t:Time {time_str: lvl.time_str, context: $context})
+                FOREACH (_ IN CASE WHEN lvl.reuse THEN [] ELSE [1] END |
+                    SET t.name = lvl.name,
+                        t.node_type = 'Time',
+                        t.time_type = $time_type,
+                        t.embedding = lvl.embedding
+                )
+                WITH t, lvl
+                ORDER BY lvl.idx
+                WITH collect(t) AS nodes
+                CALL {
+                    WITH nodes
+                    UNWIND range(1, size(nodes) - 1) AS i
+                    WITH nodes[i] AS child, nodes[i - 1] AS parent
+                    MERGE (child)-[:BELONGS_TO]->(parent)
+                }
+                RETURN elementId(nodes[size(nodes) - 1]) AS node_id
+                """,
+                levels=levels,
+                context=context,
+                time_type=time_type,
+            ).single()
 
+            most_specific_node_id = record["node_id"] if record else None
             if most_specific_node_id:
+                self._cache_put(self._time_node_cache, cache_key, most_specific_node_id, self.TIME_NODE_CACHE_SIZE)
                 logger.debug(f"Created hierarchical time node with ID: {most_specific_node_id}")
                 return most_specific_node_id
             else:
@@ -376,7 +665,7 @@ class KnowledgeGraphManager:
         note: str = "",
     ) -> Optional[str]:
         """
-        创建角色节点
+        创建角色节点（以 name + context 幂等 MERGE，已存在时复用并刷新 last_updated）
 
         Args:
             session: Neo4j session
@@ -395,34 +684,9 @@ class KnowledgeGraphManager:
         logger.debug(f"Creating character node for: {name}")
 
         try:
-            current_time = datetime.now().isoformat()
-
             character_embedding = self._generate_embedding(name)
-
-            result = session.run(
-                """
-                CREATE (c:Character {name: $name})
-                SET c.created_at = $created_at,
-                    c.node_type = 'Character',
-                    c.trust = $trust,
-                    c.context = $context,
-                    c.last_updated = $last_updated,
-                    c.embedding = $embedding,
-                    c.note = $note
-                RETURN elementId(c) as node_id
-            """,
-                name=name,
-                trust=trust,
-                context=context,
-                created_at=current_time,
-                last_updated=current_time,
-                embedding=character_embedding,
-                note=note,
-            )
-
-            record = result.single()
-            if record:
-                node_id = record["node_id"]
+            node_id = self._merge_character_node(session, name, trust, context, note, character_embedding)
+            if node_id:
                 logger.debug(f"Created character node '{name}' with ID: {node_id}")
                 return node_id
             else:
@@ -435,11 +699,39 @@ class KnowledgeGraphManager:
             logger.error(f"Failed to create character node '{name}': {e}")
             return None
 
+    def _merge_character_node(
+        self, tx, name: str, trust: float, context: str, note: str, embedding: Optional[List[float]]
+    ) -> Optional[str]:
+        """执行角色节点的 MERGE 语句（不生成 embedding、不吞掉异常），可直接作为 run_write 的事务函数"""
+        current_time = datetime.now().isoformat()
+        record = tx.run(
+            """
+            MERGE (c:Character {name: $name, context: $context})
+            ON CREATE SET c.created_at = $created_at,
+                c.node_type = 'Character',
+                c.trust = $trust,
+                c.last_updated = $last_updated,
+                c.embedding = $embedding,
+                c.note = $note
+            ON MATCH SET c.last_updated = $last_updated,
+                c.embedding = coalesce(c.embedding, $embedding)
+            RETURN elementId(c) as node_id
+            """,
+            name=name,
+            trust=trust,
+            context=context,
+            created_at=current_time,
+            last_updated=current_time,
+            embedding=embedding,
+            note=note,
+        ).single()
+        return record["node_id"] if record else None
+
     def create_location_node(
         self, session, name: str, context: str = "reality", note: str = ""
     ) -> Optional[str]:
         """
-        创建地点节点
+        创建地点节点（以 name + context 幂等 MERGE，已存在时复用并刷新 last_updated）
 
         Args:
             session: Neo4j session
@@ -457,32 +749,9 @@ class KnowledgeGraphManager:
         logger.debug(f"Creating location node for: {name}")
 
         try:
-            current_time = datetime.now().isoformat()
-
             location_embedding = self._generate_embedding(name)
-
-            result = session.run(
-                """
-                CREATE (l:Location {name: $name})
-                SET l.node_type = 'Location',
-                    l.context = $context,
-                    l.created_at = $created_at,
-                    l.last_updated = $last_updated,
-                    l.embedding = $embedding,
-                    l.note = $note
-                RETURN elementId(l) as node_id
-            """,
-                name=name,
-                context=context,
-                created_at=current_time,
-                last_updated=current_time,
-                embedding=location_embedding,
-                note=note,
-            )
-
-            record = result.single()
-            if record:
-                node_id = record["node_id"]
+            node_id = self._merge_location_node(session, name, context, note, location_embedding)
+            if node_id:
                 logger.debug(f"Created location node '{name}' with ID: {node_id}")
                 return node_id
             else:
@@ -493,6 +762,32 @@ class KnowledgeGraphManager:
             logger.error(f"Failed to create location node '{name}': {e}")
             return None
 
+    def _merge_location_node(
+        self, tx, name: str, context: str, note: str, embedding: Optional[List[float]]
+    ) -> Optional[str]:
+        """执行地点节点的 MERGE 语句（不生成 embedding、不吞掉异常），可直接作为 run_write 的事务函数"""
+        current_time = datetime.now().isoformat()
+        record = tx.run(
+            """
+            MERGE (l:Location {name: $name, context: $context})
+            ON CREATE SET l.node_type = 'Location',
+                l.created_at = $created_at,
+                l.last_updated = $last_updated,
+                l.embedding = $embedding,
+                l.note = $note
+            ON MATCH SET l.last_updated = $last_updated,
+                l.embedding = coalesce(l.embedding, $embedding)
+            RETURN elementId(l) as node_id
+            """,
+            name=name,
+            context=context,
+            created_at=current_time,
+            last_updated=current_time,
+            embedding=embedding,
+            note=note,
+        ).single()
+        return record["node_id"] if record else None
+
     def create_entity_node(
         self,
         session,
@@ -502,6 +797,7 @@ class KnowledgeGraphManager:
     ) -> Optional[str]:
         """
         创建实体节点（事件，物品，概念等）
+        以 name + context 幂等 MERGE，已存在时复用并刷新 last_updated
 
         Args:
             session: Neo4j session
@@ -520,32 +816,9 @@ class KnowledgeGraphManager:
         logger.debug(f"Creating entity node for: {name}")
 
         try:
-            current_time = datetime.now().isoformat()
-
             entity_embedding = self._generate_embedding(name)
-
-            result = session.run(
-                """
-                CREATE (e:Entity {name: $name})
-                SET e.created_at = $created_at,
-                    e.node_type = 'Entity',
-                    e.context = $context,
-                    e.note = $note,
-                    e.last_updated = $last_updated,
-                    e.embedding = $embedding
-                RETURN elementId(e) as node_id
-            """,
-                name=name,
-                context=context,
-                note=note,
-                created_at=current_time,
-                last_updated=current_time,
-                embedding=entity_embedding,
-            )
-
-            record = result.single()
-            if record:
-                node_id = record["node_id"]
+            node_id = self._merge_entity_node(session, name, context, note, entity_embedding)
+            if node_id:
                 logger.debug(f"Created entity node '{name}' with ID: {node_id}")
                 return node_id
             else:
@@ -556,6 +829,71 @@ class KnowledgeGraphManager:
             logger.error(f"Failed to create entity node '{name}': {e}")
             return None
 
+    def _merge_entity_node(
+        self, tx, name: str, context: str, note: str, embedding: Optional[List[float]]
+    ) -> Optional[str]:
+        """执行实体节点的 MERGE 语句（不生成 embedding、不吞掉异常），可直接作为 run_write 的事务函数"""
+        current_time = datetime.now().isoformat()
+        record = tx.run(
+            """
+            MERGE (e:Entity {name: $name, context: $context})
+            ON CREATE SET e.created_at = $created_at,
+                e.node_type = 'Entity',
+                e.note = $note,
+                e.last_updated = $last_updated,
+                e.embedding = $embedding
+            ON MATCH SET e.last_updated = $last_updated,
+                e.embedding = coalesce(e.embedding, $embedding)
+            RETURN elementId(e) as node_id
+            """,
+            name=name,
+            context=context,
+            note=note,
+            created_at=current_time,
+            last_updated=current_time,
+            embedding=embedding,
+        ).single()
+        return record["node_id"] if record else None
+
+    def create_named_node_managed(
+        self,
+        node_type: str,
+        name: str,
+        context: str = "reality",
+        note: str = "",
+        trust: float = 0.5,
+    ) -> Optional[str]:
+        """
+        在托管写事务中创建 Character / Location / Entity 节点（以 name + context 幂等 MERGE）。
+        embedding 在事务外生成，避免阻塞的接口调用期间持有写锁；事务函数不吞掉数据库异常，
+        由驱动对瞬时错误自动重试，重试后仍失败时异常抛给调用方。
+
+        Returns:
+            Optional[str]: 创建或复用的节点ID，参数无效或无返回结果时为None
+        """
+        name = (name or "").strip()
+        if not name:
+            logger.warning(f"{node_type} name cannot be empty")
+            return None
+
+        if node_type not in self.NAMED_NODE_LABELS:
+            logger.error(f"Unsupported node type: {node_type}")
+            return None
+
+        embedding = self._generate_embedding(name)
+        if node_type == "Character":
+            node_id = self.run_write(self._merge_character_node, name, trust, context, note, embedding)
+        elif node_type == "Location":
+            node_id = self.run_write(self._merge_location_node, name, context, note, embedding)
+        else:
+            node_id = self.run_write(self._merge_entity_node, name, context, note, embedding)
+
+        if node_id:
+            logger.debug(f"Created {node_type.lower()} node '{name}' with ID: {node_id}")
+        else:
+            logger.error(f"No result returned when creating {node_type.lower()} node '{name}'")
+        return node_id
+
     def create_relation(
         self,
         startNode_id: str,
@@ -591,149 +929,70 @@ class KnowledgeGraphManager:
             logger.error("Missing required parameters for connecting nodes")
             return None
 
-        try:
-            with self.driver.session() as session:
-                # 首先验证两个节点是否存在
-                validate_query = """
-                OPTIONAL MATCH (a) WHERE elementId(a) = $startNode_id
-                OPTIONAL MATCH (b) WHERE elementId(b) = $endNode_id
-                RETURN a IS NOT NULL as a_exists, b IS NOT NULL as b_exists,
-                       a.name as a_name, b.name as b_name,
-                       labels(a) as a_labels, labels(b) as b_labels
-                """
-                validation_result = session.run(
-                    validate_query, startNode_id=startNode_id, endNode_id=endNode_id
-                ).single()
-
-                if not validation_result["a_exists"]:
-                    logger.error(f"Node A with ID '{startNode_id}' not found")
-                    return None
+        # 处理关系类型名称，确保符合Neo4j关系类型命名规范
+        predicate_safe = _sanitize_predicate(predicate)
+
+        current_time = datetime.now().isoformat()
+        relation_props = {
+            "created_at": current_time,
+            "last_updated": current_time,
+            "predicate": predicate,
+            "source": [source],
+            "confidence": confidence,
+            "importance": importance,
+            "significance": 1,
+            "evidence": evidence,
+        }
 
-                if not validation_result["b_exists"]:
-                    logger.error(f"Node B with ID '{endNode_id}' not found")
-                    return None
+        def _create_relation_tx(tx):
+            return tx.run(
+                _CREATE_RELATION_QUERY,
+                startNode_id=startNode_id,
+                endNode_id=endNode_id,
+                predicate=predicate,
+                rel_type=predicate_safe,
+                bidirectional=directivity == "bidirectional",
+                props=relation_props,
+            ).single()
 
-                # 准备关系描述
-                direction_desc = (
-                    f"{validation_result['a_name']} -> {validation_result['b_name']}"
-                )
-                if directivity == "bidirectional":
-                    direction_desc = f"{validation_result['a_name']} <-> {validation_result['b_name']}"
-
-                # 处理关系类型名称，确保符合Neo4j关系类型命名规范
-                predicate_safe = predicate.replace(" ", "_").replace("-", "_").upper()
-                if not predicate_safe.replace("_", "").isalnum():
-                    predicate_safe = "CONNECTED_TO"  # 回退到通用关系类型
-
-                # 检测相同位置有没有同名关系
-                check_existing_query = """
-                MATCH (a) WHERE elementId(a) = $startNode_id
-                MATCH (b) WHERE elementId(b) = $endNode_id
-                OPTIONAL MATCH (a)-[r]->(b) WHERE r.predicate = $predicate
-                RETURN elementId(r) as existing_relation_id, r.predicate as existing_predicate, type(r) as relation_type
-                """
+        try:
+            record = self.run_write(_create_relation_tx)
 
-                existing_result = session.run(
-                    check_existing_query,
-                    startNode_id=startNode_id,
-                    endNode_id=endNode_id,
-                    predicate=predicate,
-                ).single()
+            if not record["a_exists"]:
+                logger.error(f"Node A with ID '{startNode_id}' not found")
+                return None
 
-                # 如果已存在相同关系，直接调用modify_relation修改并返回ID
-                if existing_result and existing_result["existing_relation_id"]:
-                    logger.info(
-                        f"Relation already exists with ID: {existing_result['existing_relation_id']}"
-                    )
-                    relationship_id = self.modify_relation(
-                        existing_result["existing_relation_id"],
-                        predicate,
-                        source,
-                        confidence,
-                        directivity,
-                        evidence,
-                        importance=importance,
-                    )
-                    return relationship_id
-
-                # 否则正常创建关系
-                current_time = datetime.now().isoformat()
-                relationship_id = None
-
-                # 创建正向关系
-                forward_query = f"""
-                MATCH (source) WHERE elementId(source) = $startNode_id
-                MATCH (target) WHERE elementId(target) = $endNode_id
-                CREATE (source)-[r:{predicate_safe}]->(target)
-                SET r.created_at = $current_time,
-                    r.last_updated = $current_time,
-                    r.predicate = $predicate,
-                    r.source = [$source],
-                    r.confidence = $confidence,
-                    r.importance = $importance,
-                    r.significance = $significance,
-                    r.evidence = $evidence
-                RETURN elementId(r) as forward_relationship_id
-                """
+            if not record["b_exists"]:
+                logger.error(f"Node B with ID '{endNode_id}' not found")
+                return None
 
-                forward_result = session.run(
-                    forward_query,
-                    startNode_id=startNode_id,
-                    endNode_id=endNode_id,
-                    predicate=predicate,
-                    source=source,
-                    confidence=confidence,
+            # 如果已存在相同关系，直接调用modify_relation修改并返回ID
+            if record["existing_relation_id"]:
+                logger.info(
+                    f"Relation already exists with ID: {record['existing_relation_id']}"
+                )
+                return self.modify_relation(
+                    record["existing_relation_id"],
+                    predicate,
+                    source,
+                    confidence,
+                    directivity,
+                    evidence,
                     importance=importance,
-                    significance=1,
-                    evidence=evidence,
-                    current_time=current_time,
                 )
 
-                forward_record = forward_result.single()
-                if forward_record:
-                    relationship_id = forward_record["forward_relationship_id"]
-                    logger.debug(f"Created relationship")
-
-                if directivity == "bidirectional":
-                    # 创建反向关系
-                    backward_query = f"""
-                    MATCH (source) WHERE elementId(source) = $endNode_id
-                    MATCH (target) WHERE elementId(target) = $startNode_id
-                    CREATE (source)-[r:{predicate_safe}]->(target)
-                    SET r.created_at = $current_time,
-                        r.last_updated = $current_time,
-                        r.predicate = $predicate,
-                        r.source = [$source],
-                        r.confidence = $confidence,
-                        r.importance = $importance,
-                        r.significance = $significance,
-                        r.evidence = $evidence
-                    RETURN elementId(r) as backward_relationship_id
-                    """
-
-                    backward_result = session.run(
-                        backward_query,
-                        startNode_id=startNode_id,
-                        endNode_id=endNode_id,
-                        predicate=predicate,
-                        source=source,
-                        confidence=confidence,
-                        importance=importance,
-                        significance=1,
-                        evidence=evidence,
-                        current_time=current_time,
-                    )
+            # 准备关系描述
+            direction_desc = f"{record['a_name']} -> {record['b_name']}"
+            if directivity == "bidirectional":
+                direction_desc = f"{record['a_name']} <-> {record['b_name']}"
 
-                    backward_record = backward_result.single()
-                    if backward_record:
-                        logger.debug(f"Created backward relationship")
-
-                if relationship_id:
-                    logger.info(f"Successfully connected nodes: {direction_desc}")
-                    return relationship_id
-                else:
-                    logger.error("Failed to create relationship")
-                    return None
+            relationship_id = record["relationship_id"]
+            if relationship_id:
+                logger.info(f"Successfully connected nodes: {direction_desc}")
+                return relationship_id
+            else:
+                logger.error("Failed to create relationship")
+                return None
 
         except Exception as e:
             logger.error(
@@ -741,13 +1000,123 @@ class KnowledgeGraphManager:
             )
             return None
 
-    def modify_node(self, node_id: str, updates: dict) -> Optional[str]:
+    # 批量创建关系时单个事务内每条 UNWIND 语句处理的行数
+    RELATION_BULK_BATCH_SIZE = 1000
+
+    def create_relations_bulk(self, relations: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        批量创建关系，语义与逐条调用 create_relation 一致：
+        两端节点不存在则失败；同位置已存在同名关系则转为 modify_relation；否则创建（双向时同时创建反向关系）。
+
+        所有新关系在同一个写事务内通过 UNWIND 写入（关系类型经 APOC 以参数传入，不按类型拆分语句）。
+
+        Args:
+            relations: 关系列表，每项包含 startNode_id, endNode_id, predicate, source，
+                可选 confidence, importance, directivity, evidence（含义同 create_relation）
+
+        Returns:
+            List[Optional[str]]: 与输入顺序一致的关系ID列表，失败项为None
+        """
+        results: List[Optional[str]] = [None] * len(relations)
+        if not relations:
+            return results
+
+        if not self._ensure_connection():
+            logger.error("Cannot connect nodes: No Neo4j connection")
+            return results
+
+        current_time = datetime.now().isoformat()
+        # 同一 (起点, 终点, predicate) 只写一次，重复项共用结果
+        rows: List[Dict[str, Any]] = []
+        first_index: Dict[tuple, int] = {}
+        duplicates: Dict[int, int] = {}
+
+        for idx, rel in enumerate(relations):
+            start_id = rel.get("startNode_id")
+            end_id = rel.get("endNode_id")
+            predicate = rel.get("predicate")
+            source = rel.get("source")
+            if not all([start_id, end_id, predicate, source]):
+                logger.error("Missing required parameters for connecting nodes")
+                continue
+
+            key = (start_id, end_id, predicate)
+            if key in first_index:
+                duplicates[idx] = first_index[key]
+                continue
+            first_index[key] = idx
+
+            rows.append({
+                "idx": idx,
+                "start_id": start_id,
+                "end_id": end_id,
+                "predicate": predicate,
+                "rel_type": _sanitize_predicate(predicate),
+                "bidirectional": rel.get("directivity", "single") == "bidirectional",
+                "props": {
+                    "created_at": current_time,
+                    "last_updated": current_time,
+                    "predicate": predicate,
+                    "source": [source],
+                    "confidence": rel.get("confidence", 0.5),
+                    "importance": rel.get("importance", 0.5),
+                    "significance": 1,
+                    "evidence": rel.get("evidence", ""),
+                },
+            })
+
+        def _create_relations_tx(tx) -> List[Dict[str, Any]]:
+            records = []
+            for offset in range(0, len(rows), self.RELATION_BULK_BATCH_SIZE):
+                batch = rows[offset:offset + self.RELATION_BULK_BATCH_SIZE]
+                records.extend(
+                    record.data()
+                    for record in tx.run(_BULK_CREATE_RELATIONS_QUERY, rows=batch)
+                )
+            return records
+
+        try:
+            records = self.run_write(_create_relations_tx)
+        except Exception as e:
+            logger.error(f"Failed to create relations in bulk: {e}")
+            return results
+
+        for record in records:
+            idx = record["idx"]
+            rel = relations[idx]
+            if not record["nodes_exist"]:
+                logger.error(
+                    f"Node not found for relation '{rel.get('startNode_id')}' -> '{rel.get('endNode_id')}'"
+                )
+            elif record["existing_relation_id"]:
+                # 已存在相同关系，转为 modify_relation
+                results[idx] = self.modify_relation(
+                    record["existing_relation_id"],
+                    rel.get("predicate"),
+                    rel.get("source"),
+                    rel.get("confidence", 0.5),
+                    rel.get("directivity", "single"),
+                    rel.get("evidence", ""),
+                    importance=rel.get("importance", 0.5),
+                )
+            else:
+                results[idx] = record["created_id"]
+
+        for idx, original_idx in duplicates.items():
+            results[idx] = results[original_idx]
+
+        created = sum(1 for relation_id in results if relation_id)
+        logger.info(f"Bulk relation write completed: {created}/{len(relations)} relations")
+        return results
+
+    def modify_node(self, node_id: str, updates: dict, tx=None) -> Optional[str]:
         """
         用于从客户端直接修改节点的属性。
 
         Args:
             node_id: Neo4j节点ID
             updates: 包含需要更新的属性的字典，键为属性名，值为新的属性值
+            tx: 可选的外部事务（如 batch() 得到的 Transaction）；传入时修改并入该事务，由调用方统一提交
 
         Returns:
             Optional[str]: 修改成功返回节点ID，失败返回None
@@ -764,193 +1133,196 @@ class KnowledgeGraphManager:
             logger.error("Updates must be a non-empty dictionary")
             return None
 
-        try:
-            with self.driver.session() as session:
-                # 首先获取节点当前信息进行验证
-                check_query = """
-                MATCH (n) WHERE elementId(n) = $node_id
-                RETURN labels(n) as node_labels, n.name as node_name, n.node_type as node_type, 
-                       n.context as node_context, properties(n) as current_properties
-                """
-
-                check_result = session.run(check_query, node_id=node_id).single()
-
-                if not check_result:
-                    logger.error(f"Node with ID '{node_id}' not found")
-                    return None
+        # 名称、语境或类型可能改变，命名节点缓存中的查重键随之失效
+        with self._node_cache_lock:
+            self._named_node_cache.clear()
+
+        # 定义需要保护的系统属性与派生属性（不会被删除）；embedding 由 name 派生，调用方不会回传
+        protected_properties = {
+            "created_at",
+            "last_updated",
+            "node_type",
+            "context",
+            "name",
+            "id",
+            "elementId",
+            "labels",
+            "embedding",
+        }
 
-                current_node_type = check_result["node_type"]
-                # 如果nodeType = Time，则拒绝修改
-                if current_node_type == "Time":
-                    logger.warning(
-                        f"Cannot modify Time node '{node_id}' - Time nodes are read-only"
-                    )
-                    return "InvalidModification"
+        def _modify_node_tx(tx):
+            """校验、标签调整、属性删除与更新在同一写事务内完成，任一步失败整体回滚"""
+            # 首先获取节点当前信息进行验证
+            check_query = """
+            MATCH (n) WHERE elementId(n) = $node_id
+            RETURN labels(n) as node_labels, n.name as node_name, n.node_type as node_type,
+                   n.context as node_context, properties(n) as current_properties
+            """
 
-        except Exception as e:
-            logger.error(f"Failed to validate node '{node_id}': {e}")
-            return None
+            check_result = tx.run(check_query, node_id=node_id).single()
 
-        try:
-            with self.driver.session() as session:
-                # 检查节点是否存在
-                check_query = """
-                MATCH (n) WHERE elementId(n) = $node_id
-                RETURN labels(n) as node_labels, n.name as node_name, properties(n) as current_properties
-                """
+            if not check_result:
+                logger.error(f"Node with ID '{node_id}' not found")
+                return None
 
-                check_result = session.run(check_query, node_id=node_id).single()
+            current_node_type = check_result["node_type"]
+            # 如果nodeType = Time，则拒绝修改
+            if current_node_type == "Time":
+                logger.warning(
+                    f"Cannot modify Time node '{node_id}' - Time nodes are read-only"
+                )
+                return "InvalidModification"
 
-                if not check_result:
-                    logger.error(f"Node with ID '{node_id}' not found")
-                    return None
+            # 获取当前节点的所有属性
+            current_properties = check_result["current_properties"] or {}
 
-                # 获取当前节点的所有属性
-                current_properties = check_result["current_properties"] or {}
-
-                # 添加当前时间戳到更新中
-                updates["last_updated"] = datetime.now().isoformat()
-
-                # 定义需要保护的系统属性（不会被删除）
-                protected_properties = {
-                    "created_at",
-                    "last_updated",
-                    "node_type",
-                    "context",
-                    "name",
-                    "id",
-                    "elementId",
-                    "labels",
-                }
+            # 添加当前时间戳到更新中
+            node_updates = dict(updates)
+            node_updates["last_updated"] = datetime.now().isoformat()
 
-                # 检查是否需要更新节点标签
-                new_node_type = updates.get("node_type")
-                current_labels = check_result["node_labels"]
-
-                # 如果需要更新节点类型，先处理标签更新
-                if new_node_type:
-                    # 定义业务相关的标签
-                    business_labels = ["Entity", "Character", "Location"]
-
-                    # 移除现有的业务标签
-                    for label in business_labels:
-                        if label in current_labels:
-                            remove_label_query = f"""
-                            MATCH (n) WHERE elementId(n) = $node_id
-                            REMOVE n:{label}
-                            """
-                            session.run(remove_label_query, node_id=node_id)
-                            logger.debug(f"Removed label '{label}' from node {node_id}")
-
-                    # 添加新的业务标签
-                    if new_node_type in business_labels:
-                        add_label_query = f"""
-                        MATCH (n) WHERE elementId(n) = $node_id
-                        SET n:{new_node_type}
-                        """
-                        session.run(add_label_query, node_id=node_id)
-                        logger.debug(f"Added label '{new_node_type}' to node {node_id}")
-
-                    # 确保node_type属性和标签一致
-                    updates["node_type"] = new_node_type
-
-                # 找出需要删除的属性（当前存在但不在updates中且不是保护属性）
-                properties_to_remove = []
-                for prop_name in current_properties.keys():
-                    if (
-                        prop_name not in updates
-                        and prop_name not in protected_properties
-                        and prop_name != "nodeType"
-                    ):  # nodeType会转换为node_type
-                        properties_to_remove.append(prop_name)
-
-                # 删除不需要的属性
-                if properties_to_remove:
-                    remove_props_query = f"""
-                    MATCH (n) WHERE elementId(n) = $node_id
-                    REMOVE {", ".join([f"n.{prop}" for prop in properties_to_remove])}
-                    """
-                    session.run(remove_props_query, node_id=node_id)
-                    logger.debug(
-                        f"Removed properties {properties_to_remove} from node {node_id}"
-                    )
+            # 标签调整、属性删除与属性更新合并为一条语句写入
+            write_clauses = []
 
-                # 构建SET子句
-                set_clauses = []
-                params = {"node_id": node_id}
+            # 检查是否需要更新节点标签
+            new_node_type = node_updates.get("node_type")
+            current_labels = check_result["node_labels"]
 
-                for key, value in updates.items():
-                    # 跳过nodeType，因为已经处理为node_type
-                    if key == "nodeType":
-                        continue
+            # 如果需要更新节点类型，先处理标签更新
+            if new_node_type:
+                # 定义业务相关的标签
+                business_labels = ["Entity", "Character", "Location"]
 
-                    # 验证属性名（避免注入攻击）
-                    if not key.replace("_", "").isalnum():
-                        logger.warning(f"Skipping invalid property name: {key}")
-                        continue
+                # 移除现有的业务标签（保留与新类型一致的标签，避免先删后加）
+                labels_to_remove = [
+                    label for label in business_labels
+                    if label in current_labels and label != new_node_type
+                ]
+                if labels_to_remove:
+                    write_clauses.append(f"REMOVE n:{':'.join(labels_to_remove)}")
+                    logger.debug(f"Removing labels {labels_to_remove} from node {node_id}")
+
+                # 添加新的业务标签
+                if new_node_type in business_labels and new_node_type not in current_labels:
+                    write_clauses.append(f"SET n:{new_node_type}")
+                    logger.debug(f"Adding label '{new_node_type}' to node {node_id}")
+
+                # 确保node_type属性和标签一致
+                node_updates["node_type"] = new_node_type
+
+            # 找出需要删除的属性（当前存在但不在updates中且不是保护属性）
+            properties_to_remove = []
+            for prop_name in current_properties.keys():
+                if (
+                    prop_name not in node_updates
+                    and prop_name not in protected_properties
+                    and prop_name != "nodeType"
+                ):  # nodeType会转换为node_type
+                    properties_to_remove.append(prop_name)
+
+            # 删除不需要的属性
+            if properties_to_remove:
+                write_clauses.append(
+                    f"REMOVE {', '.join([f'n.{prop}' for prop in properties_to_remove])}"
+                )
+                logger.debug(
+                    f"Removing properties {properties_to_remove} from node {node_id}"
+                )
 
-                    param_key = f"prop_{key}"
-                    set_clauses.append(f"n.{key} = ${param_key}")
-                    params[param_key] = value
+            # 标签与属性均无变化时跳过写入（也无需重新生成embedding）
+            if not write_clauses and all(
+                key in ("nodeType", "last_updated")
+                or not _is_safe_property_name(key)
+                or current_properties.get(key) == value
+                for key, value in node_updates.items()
+            ):
+                logger.debug(f"Node {node_id} unchanged, skipping write")
+                return node_id
 
-                if not set_clauses:
-                    logger.warning("No valid properties to update")
-                    return None
+            # 构建SET子句
+            set_clauses = []
+            params = {"node_id": node_id}
 
-                # 执行更新
-                update_query = f"""
-                MATCH (n) WHERE elementId(n) = $node_id
-                SET {", ".join(set_clauses)}
-                RETURN properties(n) as updated_properties, labels(n) as updated_labels
-                """
+            for key, value in node_updates.items():
+                # 跳过nodeType，因为已经处理为node_type
+                if key == "nodeType":
+                    continue
 
-                result = session.run(update_query, **params)
-                updated_record = result.single()
+                # 验证属性名（避免注入攻击）
+                if not _is_safe_property_name(key):
+                    logger.warning(f"Skipping invalid property name: {key}")
+                    continue
 
-                if updated_record:
-                    updated_labels = updated_record["updated_labels"]
-                    updated_properties = updated_record["updated_properties"]
-                    logger.info(
-                        f"Successfully updated node {node_id} with labels: {updated_labels}"
-                    )
+                param_key = f"prop_{key}"
+                set_clauses.append(f"n.{key} = ${param_key}")
+                params[param_key] = value
 
-                    # 重新计算并更新embedding向量
-                    try:
-                        # 根据节点类型决定使用哪个字段生成embedding
-                        embedding_text = None
-                        if 'Time' in updated_labels:
-                            # Time节点使用time字段
-                            embedding_text = updated_properties.get('time')
-                        else:
-                            # 其他节点使用name字段
-                            embedding_text = updated_properties.get('name')
-                        
-                        # 生成新的embedding
-                        if embedding_text:
-                            new_embedding = self._generate_embedding(embedding_text)
-                            
-                            if new_embedding:
-                                # 更新embedding到数据库
-                                update_embedding_query = """
-                                MATCH (n) WHERE elementId(n) = $node_id
-                                SET n.embedding = $embedding
-                                """
-                                session.run(update_embedding_query, node_id=node_id, embedding=new_embedding)
-                                logger.debug(f"Successfully updated embedding for node {node_id}")
-                            else:
-                                logger.warning(f"Failed to generate embedding for node {node_id}")
-                    except Exception as embed_error:
-                        logger.warning(f"Failed to update embedding for node {node_id}: {embed_error}")
+            if not set_clauses:
+                logger.warning("No valid properties to update")
+                return None
+            write_clauses.append(f"SET {', '.join(set_clauses)}")
+
+            # 执行更新
+            write_cypher = "\n".join(write_clauses)
+            update_query = f"""
+            MATCH (n) WHERE elementId(n) = $node_id
+            {write_cypher}
+            RETURN properties(n) as updated_properties, labels(n) as updated_labels
+            """
 
-                    return node_id
-                else:
-                    logger.error("Failed to update node")
-                    return None
+            updated_record = tx.run(update_query, **params).single()
+            if not updated_record:
+                logger.error("Failed to update node")
+                return None
+            return updated_record["updated_properties"], updated_record["updated_labels"]
 
+        try:
+            result = _modify_node_tx(tx) if tx is not None else self.run_write(_modify_node_tx)
         except Exception as e:
             logger.error(f"Failed to modify node '{node_id}': {e}")
             return None
 
+        if not isinstance(result, tuple):
+            return result
+
+        updated_properties, updated_labels = result
+        logger.info(
+            f"Successfully updated node {node_id} with labels: {updated_labels}"
+        )
+
+        # 重新计算并更新embedding向量（调用外部接口，放在修改事务之后进行）
+        try:
+            # 根据节点类型决定使用哪个字段生成embedding
+            embedding_text = None
+            if 'Time' in updated_labels:
+                # Time节点使用time字段
+                embedding_text = updated_properties.get('time')
+            else:
+                # 其他节点使用name字段
+                embedding_text = updated_properties.get('name')
+
+            # 生成新的embedding
+            if embedding_text:
+                new_embedding = self._generate_embedding(embedding_text)
+
+                if new_embedding:
+                    # 更新embedding到数据库
+                    update_embedding_query = """
+                    MATCH (n) WHERE elementId(n) = $node_id
+                    SET n.embedding = $embedding
+                    """
+                    if tx is not None:
+                        tx.run(update_embedding_query, node_id=node_id, embedding=new_embedding).consume()
+                    else:
+                        with self.driver.session() as session:
+                            session.run(update_embedding_query, node_id=node_id, embedding=new_embedding).consume()
+                    logger.debug(f"Successfully updated embedding for node {node_id}")
+                else:
+                    logger.warning(f"Failed to generate embedding for node {node_id}")
+        except Exception as embed_error:
+            logger.warning(f"Failed to update embedding for node {node_id}: {embed_error}")
+
+        return node_id
+
     def _reverse_relation_direction(self, relation_id: str) -> str:
         """令关系的指向反转"""
         if not self._ensure_connection():
@@ -992,16 +1364,16 @@ class KnowledgeGraphManager:
                     )
                     return None
 
-                # 删除原关系并创建反向关系的事务
-                reverse_query = f"""
+                # 删除原关系并创建反向关系的事务（关系类型沿用原关系，经 apoc.create.relationship 以参数传入）
+                reverse_query = """
                 MATCH (start) WHERE elementId(start) = $start_node_id
                 MATCH (end) WHERE elementId(end) = $end_node_id
-                MATCH (start)-[old_r:{rel_type_name}]->(end) WHERE elementId(old_r) = $relation_id
-                WITH start, end, old_r, properties(old_r) as old_props
+                MATCH (start)-[old_r]->(end) WHERE elementId(old_r) = $relation_id
+                WITH start, end, old_r, type(old_r) as old_type, properties(old_r) as old_props
                 DELETE old_r
-                CREATE (end)-[new_r:{rel_type_name}]->(start)
-                SET new_r = old_props
-                RETURN elementId(new_r) as new_relation_id
+                WITH start, end, old_type, old_props
+                CALL apoc.create.relationship(end, old_type, old_props, start) YIELD rel
+                RETURN elementId(rel) as new_relation_id
                 """
 
                 reverse_result = session.run(
@@ -1069,135 +1441,143 @@ class KnowledgeGraphManager:
             )
             return None
 
-        try:
-            with self.driver.session() as session:
-                # 检查关系是否存在并获取节点信息
-                check_query = """
-                MATCH (a)-[r]->(b) WHERE elementId(r) = $relation_id
-                RETURN elementId(a) as source_node_id, elementId(b) as target_node_id,
-                       a.name as source_name, b.name as target_name,
-                       type(r) as rel_type_name, properties(r) as current_properties
-                """
-
-                check_result = session.run(
-                    check_query, relation_id=relation_id
-                ).single()
+        # 检查关系是否存在并获取节点信息
+        check_query = """
+        MATCH (a)-[r]->(b) WHERE elementId(r) = $relation_id
+        RETURN elementId(a) as source_node_id, elementId(b) as target_node_id,
+               a.name as source_name, b.name as target_name,
+               type(r) as rel_type_name, properties(r) as current_properties
+        """
 
-                if not check_result:
-                    logger.error(f"Relation with ID '{relation_id}' not found")
-                    return None
+        update_query = """
+        MATCH ()-[r]->() WHERE elementId(r) = $relation_id
+        SET r += $updates
+        RETURN elementId(r) as updated_relation_id
+        """
 
-                start_node = check_result["source_node_id"]
-                end_node = check_result["target_node_id"]
-                source_name = check_result["source_name"]
-                target_name = check_result["target_name"]
-                rel_type_name = check_result["rel_type_name"]
-                current_properties = check_result["current_properties"]
-                # 如果关系类型是BELONGS_TO，拒绝修改
-                if rel_type_name == "BELONGS_TO":
-                    logger.warning(
-                        f"Cannot modify BELONGS_TO relation with ID '{relation_id}' - BELONGS_TO relations are protected"
-                    )
-                    return None
+        def _modify_relation_tx(tx) -> Optional[tuple]:
+            """检查、计算与写入在同一写事务内完成；需要反转方向时删除原关系并就地创建反向关系"""
+            check_result = tx.run(check_query, relation_id=relation_id).single()
 
-                # 更新现有关系的属性
-                current_time = datetime.now().isoformat()
+            if not check_result:
+                logger.error(f"Relation with ID '{relation_id}' not found")
+                return None
 
-                # 处理source合并和置信度计算
-                current_source = (
-                    current_properties.get("source") if current_properties else []
-                )
-                current_confidence = (
-                    current_properties.get("confidence", 0.5)
-                    if current_properties
-                    else 0.5
+            source_name = check_result["source_name"]
+            target_name = check_result["target_name"]
+            rel_type_name = check_result["rel_type_name"]
+            current_properties = check_result["current_properties"]
+            # 如果关系类型是BELONGS_TO，拒绝修改
+            if rel_type_name == "BELONGS_TO":
+                logger.warning(
+                    f"Cannot modify BELONGS_TO relation with ID '{relation_id}' - BELONGS_TO relations are protected"
                 )
+                return None
 
-                # 将字符串格式的source转换为list（向后兼容）
-                if isinstance(current_source, str):
-                    if current_source:
-                        current_source = [
-                            s.strip() for s in current_source.split(",") if s.strip()
-                        ]
-                    else:
-                        current_source = []
-                elif not isinstance(current_source, list):
-                    current_source = []
+            # 更新现有关系的属性
+            current_time = datetime.now().isoformat()
 
-                # 合并source列表
-                source_list = current_source.copy() if current_source else []
-                if source not in source_list:
-                    source_list.append(source)
+            # 处理source合并和置信度计算
+            current_source = (
+                current_properties.get("source") if current_properties else []
+            )
+            current_confidence = (
+                current_properties.get("confidence", 0.5)
+                if current_properties
+                else 0.5
+            )
 
-                    # 计算新的置信度：new_confidence = (1-(1-old_confidence)*(1-confidence/2))
-                    try:
-                        current_confidence = float(current_confidence)
-                        new_confidence = 1 - (1 - current_confidence) * (1 - confidence / 2)
-                        # 确保置信度在0-1范围内
-                        new_confidence = max(0.0, min(1.0, new_confidence))
-                    except (ValueError, TypeError):
-                        new_confidence = confidence
+            # 将字符串格式的source转换为list（向后兼容）
+            if isinstance(current_source, str):
+                if current_source:
+                    current_source = [
+                        s.strip() for s in current_source.split(",") if s.strip()
+                    ]
                 else:
-                    # source已存在，不更新置信度
-                    new_confidence = current_confidence
+                    current_source = []
+            elif not isinstance(current_source, list):
+                current_source = []
 
-                if directivity == "to_startNode":
-                    relation_id = self._reverse_relation_direction(relation_id)
+            # 合并source列表
+            source_list = current_source.copy() if current_source else []
+            if source not in source_list:
+                source_list.append(source)
 
-                if directivity != "bidirectional":
-                    directivity = "single"
+                # 计算新的置信度：new_confidence = (1-(1-old_confidence)*(1-confidence/2))
+                try:
+                    current_confidence = float(current_confidence)
+                    new_confidence = 1 - (1 - current_confidence) * (1 - confidence / 2)
+                    # 确保置信度在0-1范围内
+                    new_confidence = max(0.0, min(1.0, new_confidence))
+                except (ValueError, TypeError):
+                    new_confidence = confidence
+            else:
+                # source已存在，不更新置信度
+                new_confidence = current_confidence
+
+            # 处理importance和significance
+            current_importance = (
+                current_properties.get("importance", 0.5)
+                if current_properties
+                else 0.5
+            )
 
-                # 处理importance和significance
-                current_importance = (
-                    current_properties.get("importance", 0.5)
-                    if current_properties
-                    else 0.5
-                )
+            updates = {
+                "predicate": predicate,
+                "source": source_list,
+                "confidence": new_confidence,
+                "importance": importance if importance is not None else current_importance,
+                "significance": 1,
+                "evidence": evidence,
+                "last_updated": current_time,
+            }
 
-                new_importance = importance if importance is not None else current_importance
-                new_significance = 1
-
-                update_query = """
-                MATCH ()-[r]-() WHERE elementId(r) = $relation_id
-                SET r.predicate = $predicate,
-                    r.source = $source_list,
-                    r.confidence = $new_confidence,
-                    r.importance = $importance,
-                    r.significance = $significance,
-                    r.evidence = $evidence,
-                    r.last_updated = $current_time
-                RETURN elementId(r) as updated_relation_id
+            if directivity == "to_startNode":
+                # 删除原关系并创建反向关系（保留原属性），与属性更新同属一个事务；
+                # 关系类型沿用原关系，经 apoc.create.relationship 以参数传入，无需按类型拼接语句
+                reverse_query = """
+                MATCH (start)-[old_r]->(end) WHERE elementId(old_r) = $relation_id
+                WITH start, end, old_r, type(old_r) as old_type, properties(old_r) as old_props
+                DELETE old_r
+                WITH start, end, old_type, old_props
+                CALL apoc.create.relationship(end, old_type, old_props, start) YIELD rel
+                SET rel += $updates
+                RETURN elementId(rel) as updated_relation_id
                 """
-
-                update_result = session.run(
-                    update_query,
-                    relation_id=relation_id,
-                    predicate=predicate,
-                    source_list=source_list,
-                    new_confidence=new_confidence,
-                    importance=new_importance,
-                    significance=new_significance,
-                    evidence=evidence,
-                    directivity=directivity,
-                    current_time=current_time,
-                )
-
-                update_record = update_result.single()
-
+                update_record = tx.run(
+                    reverse_query, relation_id=relation_id, updates=updates
+                ).single()
                 if update_record:
                     logger.info(
-                        f"Successfully updated relation {relation_id} between {source_name} and {target_name}"
+                        f"Successfully reversed relation direction: {source_name} -> {target_name} became {target_name} -> {source_name}"
                     )
+            else:
+                update_record = tx.run(
+                    update_query, relation_id=relation_id, updates=updates
+                ).single()
 
-                    return relation_id
-                else:
-                    logger.error(f"Failed to update relation {relation_id}")
-                    return None
+            if not update_record:
+                return None
+            return update_record["updated_relation_id"], source_name, target_name
+
+        try:
+            result = self.run_write(_modify_relation_tx)
+
+            if result:
+                updated_relation_id, source_name, target_name = result
+                logger.info(
+                    f"Successfully updated relation {updated_relation_id} between {source_name} and {target_name}"
+                )
+
+                return updated_relation_id
+            else:
+                logger.error(f"Failed to update relation {relation_id}")
+                return None
 
         except Exception as e:
             logger.error(f"Failed to modify relation '{relation_id}': {e}")
             return None
-        
+
     def collide_nodes(self, node_id_1: str, node_id_2: str) -> Optional[str]:
         """
         将所选的两个节点，合并成一个节点。
@@ -1218,66 +1598,75 @@ class KnowledgeGraphManager:
             logger.error("Node IDs cannot be empty")
             return None
 
-        try:
-            with self.driver.session() as session:
-                # 查询两个节点的信息
-                query = """
-                MATCH (n) WHERE elementId(n) IN [$node_id_1, $node_id_2]
-                RETURN elementId(n) as node_id, n.name as name, n.node_type as node_type,
-                       n.context as context, properties(n) as properties, labels(n) as labels
-                """
+        # 该操作可能删除节点，清空进程内节点缓存
+        self._invalidate_node_caches()
 
-                result = session.run(query, node_id_1=node_id_1, node_id_2=node_id_2)
-                nodes_info = {record["node_id"]: record for record in result}
+        def _collide_nodes_tx(tx) -> Optional[tuple]:
+            # 查询两个节点的信息
+            query = """
+            MATCH (n) WHERE elementId(n) IN [$node_id_1, $node_id_2]
+            RETURN elementId(n) as node_id, n.name as name, n.node_type as node_type,
+                   n.context as context, properties(n) as properties, labels(n) as labels
+            """
 
-                if len(nodes_info) != 2:
-                    logger.error("One or both nodes not found for collision")
-                    return None
+            result = tx.run(query, node_id_1=node_id_1, node_id_2=node_id_2)
+            nodes_info = {record["node_id"]: record for record in result}
 
-                node1_info = nodes_info[node_id_1]
-                node2_info = nodes_info[node_id_2]
+            if len(nodes_info) != 2:
+                return None
 
-                # 将节点2的出关系迁移到节点1（跳过指向节点1的自环）
-                session.run(
-                    """
-                    MATCH (n2)-[r]->(target) WHERE elementId(n2) = $node_id_2
-                      AND elementId(target) <> $node_id_1
-                    MATCH (n1) WHERE elementId(n1) = $node_id_1
-                    WITH n1, target, type(r) as rel_type, properties(r) as rel_props, r
-                    CALL apoc.create.relationship(n1, rel_type, rel_props, target) YIELD rel
-                    DELETE r
-                    """,
-                    node_id_1=node_id_1,
-                    node_id_2=node_id_2,
-                )
+            # 将节点2的出关系迁移到节点1（跳过指向节点1的自环）
+            tx.run(
+                """
+                MATCH (n2)-[r]->(target) WHERE elementId(n2) = $node_id_2
+                  AND elementId(target) <> $node_id_1
+                MATCH (n1) WHERE elementId(n1) = $node_id_1
+                WITH n1, target, type(r) as rel_type, properties(r) as rel_props, r
+                CALL apoc.create.relationship(n1, rel_type, rel_props, target) YIELD rel
+                DELETE r
+                """,
+                node_id_1=node_id_1,
+                node_id_2=node_id_2,
+            ).consume()
 
-                # 将节点2的入关系迁移到节点1（跳过来自节点1的自环）
-                session.run(
-                    """
-                    MATCH (source)-[r]->(n2) WHERE elementId(n2) = $node_id_2
-                      AND elementId(source) <> $node_id_1
-                    MATCH (n1) WHERE elementId(n1) = $node_id_1
-                    WITH n1, source, type(r) as rel_type, properties(r) as rel_props, r
-                    CALL apoc.create.relationship(source, rel_type, rel_props, n1) YIELD rel
-                    DELETE r
-                    """,
-                    node_id_1=node_id_1,
-                    node_id_2=node_id_2,
-                )
+            # 将节点2的入关系迁移到节点1（跳过来自节点1的自环）
+            tx.run(
+                """
+                MATCH (source)-[r]->(n2) WHERE elementId(n2) = $node_id_2
+                  AND elementId(source) <> $node_id_1
+                MATCH (n1) WHERE elementId(n1) = $node_id_1
+                WITH n1, source, type(r) as rel_type, properties(r) as rel_props, r
+                CALL apoc.create.relationship(source, rel_type, rel_props, n1) YIELD rel
+                DELETE r
+                """,
+                node_id_1=node_id_1,
+                node_id_2=node_id_2,
+            ).consume()
 
-                # 删除节点2上剩余的关系（节点1和节点2之间的直接关系）及节点2本身
-                session.run(
-                    """
-                    MATCH (n2) WHERE elementId(n2) = $node_id_2
-                    DETACH DELETE n2
-                    """,
-                    node_id_2=node_id_2,
-                )
+            # 删除节点2上剩余的关系（节点1和节点2之间的直接关系）及节点2本身
+            tx.run(
+                """
+                MATCH (n2) WHERE elementId(n2) = $node_id_2
+                DETACH DELETE n2
+                """,
+                node_id_2=node_id_2,
+            ).consume()
 
-                logger.info(
-                    f"Successfully collided nodes: '{node2_info['name']}' merged into '{node1_info['name']}' (ID: {node_id_1})"
-                )
-                return node_id_1
+            return nodes_info[node_id_1]["name"], nodes_info[node_id_2]["name"]
+
+        try:
+            # 迁移与删除在同一托管事务内完成：中途失败整体回滚，瞬时错误由驱动重试
+            result = self.run_write(_collide_nodes_tx)
+
+            if not result:
+                logger.error("One or both nodes not found for collision")
+                return None
+
+            node1_name, node2_name = result
+            logger.info(
+                f"Successfully collided nodes: '{node2_name}' merged into '{node1_name}' (ID: {node_id_1})"
+            )
+            return node_id_1
 
         except Exception as e:
             logger.error(f"Failed to collide nodes '{node_id_1}' and '{node_id_2}': {e}")
@@ -1329,17 +1718,44 @@ class KnowledgeGraphManager:
             logger.warning("ensure_node_exists is not applicable to Time nodes")
             return None
 
+        if node_type not in self.NAMED_NODE_LABELS:
+            logger.error(f"Unsupported node type: {node_type}")
+            return None
+
         time_str = time_str or []
 
+        # 同一绑定节点（如QQ用户、群）每条消息都会确认一次：命中缓存时按 elementId 直接校验，
+        # 节点可能已被其他进程（如可视化服务、记忆衰退）删除或合并，且 elementId 会被复用，不能直接信任缓存
+        cache_key = (node_type, (name or "").strip(), context)
+        cached_node_id = self._cache_get(self._named_node_cache, cache_key)
+
         def _find_existing_node(tx) -> Optional[str]:
             normalized_name = (name or "").strip()
             if not normalized_name:
                 logger.warning(f"Cannot ensure {node_type} node: name is empty")
                 return None
 
+            if cached_node_id:
+                record = tx.run(
+                    f"""
+                    MATCH (n:{node_type})
+                    WHERE elementId(n) = $node_id AND n.name = $name AND n.context = $context
+                    RETURN elementId(n) as node_id
+                    """,
+                    node_id=cached_node_id,
+                    name=normalized_name,
+                    context=context,
+                ).single()
+                if record:
+                    return record["node_id"]
+                # 缓存的节点已不存在或已被复用：移除后按常规流程查找
+                self._cache_evict(self._named_node_cache, cache_key)
+
+            # 按标签限定匹配，命中 (name, context) 属性索引，避免全库扫描
             record = tx.run(
-                """
-                MATCH (n {name: $name, node_type: $node_type, context: $context})
+                f"""
+                MATCH (n:{node_type} {{name: $name, context: $context}})
+                WHERE n.node_type = $node_type
                 RETURN elementId(n) as node_id
                 ORDER BY n.last_updated DESC
                 LIMIT 1
@@ -1365,20 +1781,18 @@ class KnowledgeGraphManager:
 
         try:
             if session is not None:
-                existing_node_id = _find_existing_node(session)
-                if existing_node_id:
-                    return existing_node_id
-                return _create_node(session)
-
-            with self.driver.session() as local_session:
-                existing_node_id = _find_existing_node(local_session)
-                if existing_node_id:
-                    return existing_node_id
-                return _create_node(local_session)
+                node_id = _find_existing_node(session) or _create_node(session)
+            else:
+                with self.driver.session() as local_session:
+                    node_id = _find_existing_node(local_session) or _create_node(local_session)
         except Exception as e:
             logger.error(f"Failed to ensure node exists ({node_type}): {e}")
             return None
 
+        if node_id:
+            self._cache_put(self._named_node_cache, cache_key, node_id, self.NAMED_NODE_CACHE_SIZE)
+        return node_id
+
     def ensure_relation_exists(
         self,
         *,
@@ -1432,353 +1846,119 @@ class KnowledgeGraphManager:
             logger.error("Cannot perform memory decay: No Neo4j connection")
             return
 
-        try:
-            with self.driver.session() as session:
-                # 1. 衰退所有有significance的关系
-                result = session.run(
-                    """
-                    MATCH ()-[r]->()
-                    WHERE r.significance IS NOT NULL AND r.importance IS NOT NULL
-                    SET r.significance = r.significance * ($decay_factor + r.importance * (1 - $decay_factor))
-                    RETURN count(r) as updated_count
-                    """,
-                    decay_factor=decay_factor,
-                )
-                decay_count = result.single()["updated_count"]
-                logger.info(f"Memory decay applied to {decay_count} relationships (decay_factor={decay_factor})")
-
-                # 2. 基于时间精细度的关系梯度提升
-                # 不同精细度的时间节点有不同的significance阈值，低于阈值则提升至上一级时间节点
-                granularity_thresholds = {
-                    "秒": 0.9,
-                    "分": 0.75,
-                    "点": 0.55,
-                    "日": 0.35,
-                    "月": 0.2,
-                }
-
-                promoted_count = 0
-
-                # 获取所有连接Time节点的非BELONGS_TO关系
-                result = session.run(
-                    """
-                    MATCH (a)-[r]->(b)
-                    WHERE r.significance IS NOT NULL
-                      AND (a:Time OR b:Time)
-                      AND type(r) <> 'BELONGS_TO'
-                    RETURN elementId(r) as rel_id, elementId(a) as start_id, elementId(b) as end_id,
-                           type(r) as rel_type,
-                           labels(a) as start_labels, labels(b) as end_labels,
-                           a.name as start_name, b.name as end_name,
-                           r.significance as significance
-                    """
-                )
-                time_rels = list(result)
-
-                for record in time_rels:
-                    rel_id = record["rel_id"]
-                    significance = record["significance"]
-                    start_labels = record["start_labels"] or []
-                    end_labels = record["end_labels"] or []
-
-                    # 确定时间节点和另一端节点
-                    if "Time" in end_labels:
-                        time_node_id = record["end_id"]
-                        other_node_id = record["start_id"]
-                        time_name = record["end_name"]
-                        is_time_at_end = True
-                    elif "Time" in start_labels:
-                        time_node_id = record["start_id"]
-                        other_node_id = record["end_id"]
-                        time_name = record["start_name"]
-                        is_time_at_end = False
-                    else:
-                        continue
-
-                    if not time_name:
-                        continue
-
-                    # 根据时间节点名称后缀判断精细度，非标准精细度（周、轮次等）不处理
-                    threshold = None
-                    for suffix, thresh in granularity_thresholds.items():
-                        if time_name.endswith(suffix):
-                            threshold = thresh
-                            break
-
-                    if threshold is None or significance >= threshold:
-                        continue
-
-                    # 查找上一级时间节点
-                    parent_result = session.run(
-                        """
-                        MATCH (t:Time)-[:BELONGS_TO]->(parent:Time)
-                        WHERE elementId(t) = $time_node_id
-                        RETURN elementId(parent) as parent_id, parent.name as parent_name
-                        """,
-                        time_node_id=time_node_id,
-                    )
-                    parent_record = parent_result.single()
-
-                    if not parent_record:
-                        continue
-
-                    parent_id = parent_record["parent_id"]
-                    parent_name = parent_record["parent_name"]
-
-                    # 将关系迁移至上一级时间节点，significance重置为1
-                    if is_time_at_end:
-                        promote_result = session.run(
-                            """
-                            MATCH (other) WHERE elementId(other) = $other_id
-                            MATCH (parent:Time) WHERE elementId(parent) = $parent_id
-                            MATCH ()-[old_r]->() WHERE elementId(old_r) = $rel_id
-                            WITH other, parent, old_r, properties(old_r) as old_props, type(old_r) as old_type
-                            DELETE old_r
-                            WITH other, parent, old_props, old_type
-                            CALL apoc.create.relationship(other, old_type, old_props, parent) YIELD rel
-                            RETURN elementId(rel) as new_rel_id
-                            """,
-                            other_id=other_node_id,
-                            parent_id=parent_id,
-                            rel_id=rel_id,
-                        )
-                    else:
-                        promote_result = session.run(
-                            """
-                            MATCH (other) WHERE elementId(other) = $other_id
-                            MATCH (parent:Time) WHERE elementId(parent) = $parent_id
-                            MATCH ()-[old_r]->() WHERE elementId(old_r) = $rel_id
-                            WITH other, parent, old_r, properties(old_r) as old_props, type(old_r) as old_type
-                            DELETE old_r
-                            WITH other, parent, old_props, old_type
-                            CALL apoc.create.relationship(parent, old_type, old_props, other) YIELD rel
-                            RETURN elementId(rel) as new_rel_id
-                            """,
-                            other_id=other_node_id,
-                            parent_id=parent_id,
-                            rel_id=rel_id,
-                        )
-
-                    if promote_result.single():
-                        promoted_count += 1
-                        logger.debug(
-                            f"Promoted relation from time '{time_name}' to '{parent_name}' (significance={significance:.2f})"
-                        )
-
-                if promoted_count > 0:
-                    logger.info(f"Promoted {promoted_count} relationships to parent time nodes")
-
-                # 3. 删除significance低于0.1的剩余关系
-                result = session.run(
-                    """
-                    MATCH ()-[r]->()
-                    WHERE r.significance IS NOT NULL AND r.significance < 0.1
-                      AND type(r) <> 'BELONGS_TO'
-                    DELETE r
-                    RETURN count(r) as deleted_count
-                    """
-                )
-                deleted_rels = result.single()["deleted_count"]
-                if deleted_rels > 0:
-                    logger.info(f"Deleted {deleted_rels} relationships with significance < 0.1")
-
-                # 4. 清理孤立时间节点（没有入关系的Time节点）
-                result = session.run(
-                    """
-                    MATCH (t:Time)
-                    WHERE NOT EXISTS { MATCH ()-[]->(t) }
-                    DETACH DELETE t
-                    RETURN count(t) as deleted_count
-                    """
-                )
-                deleted_time = result.single()["deleted_count"]
-                if deleted_time > 0:
-                    logger.info(f"Deleted {deleted_time} orphaned Time nodes")
-
-                # 5. 清理其余孤立节点（既无入关系也无出关系的非Time节点）
-                result = session.run(
-                    """
-                    MATCH (n)
-                    WHERE NOT n:Time
-                      AND NOT EXISTS { MATCH (n)-[]-() }
-                    DELETE n
-                    RETURN count(n) as deleted_count
-                    """
-                )
-                deleted_other = result.single()["deleted_count"]
-                if deleted_other > 0:
-                    logger.info(f"Deleted {deleted_other} orphaned non-Time nodes")
-
-        except Exception as e:
-            logger.error(f"Failed to apply memory decay: {e}")
-
-    def _find_node(
-        self,
-        session,
-        node_name: str,
-        node_type: str,
-        time: str,
-        location: str,
-        signature_node: str,
-        context: str,
-    ) -> Optional[str]:
-        """
-        查找匹配的客体节点
-
-        Args:
-            session: Neo4j session
-            node_name: 节点名称
-            node_type: 节点类型
-            time: 事件发生的时间（选填）
-            location: 事件发生的地点（选填）
-            signature_node: 相连的特征节点（选填）
-
-        Returns:
-            Optional[str]: 找到的节点ID，找不到返回None
-        """
-        try:
-            current_time = datetime.now()
-
-            # 第1步：查找所有同名节点
-            same_name_nodes_query = """
-            MATCH (n {name: $name})
-            OPTIONAL MATCH (n)-[:HAPPENED_AT]->(t:Time)
-            OPTIONAL MATCH (n)-[:HAPPENED_IN]->(l:Location)
-            RETURN elementId(n) as node_id, n.last_updated as last_updated,
-                   labels(n) as node_labels, n.node_type as node_type, n.context as node_context,
-                   t.time as node_time, l.name as node_location
-            """
-
-            same_name_results = session.run(same_name_nodes_query, name=node_name)
-            candidates = []
+        # 该操作可能删除节点，清空进程内节点缓存
+        self._invalidate_node_caches()
 
-            for record in same_name_results:
-                candidates.append(
-                    {
-                        "node_id": record["node_id"],
-                        "last_updated": record["last_updated"],
-                        "node_labels": record["node_labels"],
-                        "node_type": record["node_type"],
-                        "node_time": record["node_time"],
-                        "node_location": record["node_location"],
-                        "node_context": record["node_context"],
-                    }
-                )
-
-            if not candidates:
-                # 没有找到同名节点
-                return None
-
-            # 第2步：移除不符合类型（node_type）和语境（context）的节点
-            if node_type:  # 只有提供了node_type才进行类型过滤
-                candidates = [
-                    candidate
-                    for candidate in candidates
-                    if candidate["node_type"] == node_type
-                    and context in candidate["node_context"]
-                ]
-                if not candidates:
-                    return None
-
-            # 第3步：移除不符合时间条件的节点
-            if time:  # 只有提供了time才进行时间过滤
-                # 优先选择有明确时间匹配的节点
-                time_matched_candidates = [
-                    candidate
-                    for candidate in candidates
-                    if candidate["node_time"] == time
-                ]
+        def _memory_decay_tx(tx) -> tuple:
+            """衰退、时间梯度提升与清理在同一写事务内完成，一次提交，失败整体回滚"""
+            # 1. 衰退所有有significance的关系
+            result = tx.run(
+                """
+                MATCH ()-[r]->()
+                WHERE r.significance IS NOT NULL AND r.importance IS NOT NULL
+                SET r.significance = r.significance * ($decay_factor + r.importance * (1 - $decay_factor))
+                RETURN count(r) as updated_count
+                """,
+                decay_factor=decay_factor,
+            )
+            decay_count = result.single()["updated_count"]
+
+            # 2. 基于时间精细度的关系梯度提升
+            # 不同精细度的时间节点有不同的significance阈值，低于阈值则提升至上一级时间节点
+            granularity_thresholds = {
+                "秒": 0.9,
+                "分": 0.75,
+                "点": 0.55,
+                "日": 0.35,
+                "月": 0.2,
+            }
 
-                # 如果有明确时间匹配的节点，就只使用这些节点
-                if time_matched_candidates:
-                    candidates = time_matched_candidates
-                else:
-                    # 如果没有明确匹配的，才考虑无时间信息的节点
-                    candidates = [
-                        candidate
-                        for candidate in candidates
-                        if not candidate["node_time"]
-                    ]
-                # 如果也无法匹配，返回None
-                if not candidates:
-                    return None
+            # 阈值判断、上一级时间节点查找与关系迁移在一条语句内完成（时间节点优先取终点一侧），
+            # 将关系迁移至上一级时间节点并保留原属性
+            result = tx.run(
+                """
+                MATCH (a)-[r]->(b)
+                WHERE r.significance IS NOT NULL
+                  AND (a:Time OR b:Time)
+                  AND type(r) <> 'BELONGS_TO'
+                WITH a, b, r, b:Time AS is_time_at_end
+                WITH a, b, r, is_time_at_end,
+                     CASE WHEN is_time_at_end THEN b ELSE a END AS t,
+                     CASE WHEN is_time_at_end THEN a ELSE b END AS other
+                WITH r, t, other, is_time_at_end,
+                     [g IN $granularity_thresholds WHERE t.name ENDS WITH g.suffix][0] AS granularity
+                WHERE granularity IS NOT NULL AND r.significance < granularity.threshold
+                MATCH (t)-[:BELONGS_TO]->(parent:Time)
+                WITH r, other, is_time_at_end, collect(parent)[0] AS parent
+                WITH r, other, is_time_at_end, parent, properties(r) as old_props, type(r) as old_type
+                DELETE r
+                WITH other, parent, old_props, old_type,
+                     CASE WHEN is_time_at_end THEN other ELSE parent END AS new_start,
+                     CASE WHEN is_time_at_end THEN parent ELSE other END AS new_end
+                CALL apoc.create.relationship(new_start, old_type, old_props, new_end) YIELD rel
+                RETURN count(rel) as promoted_count
+                """,
+                granularity_thresholds=[
+                    {"suffix": suffix, "threshold": threshold}
+                    for suffix, threshold in granularity_thresholds.items()
+                ],
+            )
+            promoted_count = result.single()["promoted_count"]
 
-            # 第4步：移除不符合地点条件的节点
-            if location:  # 只有提供了location才进行地点过滤
-                location_matched_candidates = [
-                    candidate
-                    for candidate in candidates
-                    if candidate["node_location"] == location
-                ]
+            # 3. 删除significance低于0.1的剩余关系
+            result = tx.run(
+                """
+                MATCH ()-[r]->()
+                WHERE r.significance IS NOT NULL AND r.significance < 0.1
+                  AND type(r) <> 'BELONGS_TO'
+                DELETE r
+                RETURN count(r) as deleted_count
+                """
+            )
+            deleted_rels = result.single()["deleted_count"]
 
-                # 如果有明确地点匹配的节点，就只使用这些节点
-                if location_matched_candidates:
-                    candidates = location_matched_candidates
-                else:
-                    # 如果没有明确匹配的，才考虑无地点信息的节点
-                    candidates = [
-                        candidate
-                        for candidate in candidates
-                        if not candidate["node_location"]
-                    ]
-                # 如果也无法匹配，返回None
-                if not candidates:
-                    return None
+            # 4. 清理孤立时间节点（没有入关系的Time节点）
+            result = tx.run(
+                """
+                MATCH (t:Time)
+                WHERE NOT EXISTS { MATCH ()-[]->(t) }
+                DETACH DELETE t
+                RETURN count(t) as deleted_count
+                """
+            )
+            deleted_time = result.single()["deleted_count"]
 
-            # 如果只有一个候选节点，直接返回（通常只应该有一个候选节点）
-            if len(candidates) == 1:
-                return candidates[0]["node_id"]
+            # 5. 清理其余孤立节点（既无入关系也无出关系的非Time节点）
+            result = tx.run(
+                """
+                MATCH (n)
+                WHERE NOT n:Time
+                  AND NOT EXISTS { MATCH (n)-[]-() }
+                DELETE n
+                RETURN count(n) as deleted_count
+                """
+            )
+            deleted_other = result.single()["deleted_count"]
 
-            # 第5步：如果仍有多个候选，使用特征节点进行匹配，查询每个候选是否与特征节点相连。
-            if signature_node:
-                signature_matched_candidates = []
-                for candidate in candidates:
-                    signature_check_query = """
-                    MATCH (n) WHERE elementId(n) = $node_id
-                    MATCH (s {name: $signature_name})
-                    RETURN EXISTS( (n)-[]->(s) OR (s)-[]->(n) ) as is_connected
-                    """
-                    signature_result = session.run(
-                        signature_check_query,
-                        node_id=candidate["node_id"],
-                        signature_name=signature_node,
-                    ).single()
-                    if signature_result and signature_result["is_connected"]:
-                        signature_matched_candidates.append(candidate)
-
-                # 如果有与特征节点相连的候选，使用这些候选；否则继续使用原有候选
-                if signature_matched_candidates:
-                    candidates = signature_matched_candidates
-
-            # 再检查一下节点数量
-            if len(candidates) == 1:
-                return candidates[0]["node_id"]
-
-            # 第6步：如果仍有多个候选节点，按last_updated排序选择最近更新的
-            def parse_datetime(dt_str):
-                if not dt_str:
-                    return datetime.min
-                try:
-                    return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                except:
-                    return datetime.min
-
-            # 计算与当前时间的距离
-            for candidate in candidates:
-                last_updated_dt = parse_datetime(candidate["last_updated"])
-                candidate["time_distance"] = abs(
-                    (current_time - last_updated_dt).total_seconds()
-                )
+            return decay_count, promoted_count, deleted_rels, deleted_time, deleted_other
 
-            # 按时间距离排序，选择最近更新的节点
-            candidates.sort(key=lambda x: x["time_distance"])
+        try:
+            decay_count, promoted_count, deleted_rels, deleted_time, deleted_other = self.run_write(
+                _memory_decay_tx
+            )
 
-            # 由于last_updated基于时间且绝对不会重复，直接返回最接近当前时间的节点
-            return candidates[0]["node_id"]
+            logger.info(f"Memory decay applied to {decay_count} relationships (decay_factor={decay_factor})")
+            if promoted_count > 0:
+                logger.info(f"Promoted {promoted_count} relationships to parent time nodes")
+            if deleted_rels > 0:
+                logger.info(f"Deleted {deleted_rels} relationships with significance < 0.1")
+            if deleted_time > 0:
+                logger.info(f"Deleted {deleted_time} orphaned Time nodes")
+            if deleted_other > 0:
+                logger.info(f"Deleted {deleted_other} orphaned non-Time nodes")
 
         except Exception as e:
-            logger.error(f"Failed to find object node '{node_name}': {e}")
-            return None
+            logger.error(f"Failed to apply memory decay: {e}")
 
     def get_statistics(self) -> Dict[str, Any]:
         """获取知识图谱统计信息"""
@@ -1787,24 +1967,29 @@ class KnowledgeGraphManager:
 
         try:
             with self.driver.session() as session:
+                # 单条语句完成统计：按标签计数走计数存储，关系只扫描一遍即可同时统计两类
+                record = session.run(
+                    """
+                    CALL { MATCH (n:Entity) RETURN count(n) as entity_count }
+                    CALL { MATCH (n:Time) RETURN count(n) as time_count }
+                    CALL { MATCH (n:Location) RETURN count(n) as location_count }
+                    CALL {
+                        MATCH ()-[r]->()
+                        RETURN count(CASE WHEN r.predicate IS NOT NULL AND r.action IS NULL THEN 1 END) as triple_rels,
+                               count(CASE WHEN r.action IS NOT NULL THEN 1 END) as quintuple_rels
+                    }
+                    RETURN entity_count, time_count, location_count, triple_rels, quintuple_rels
+                    """
+                ).single()
+
                 # 获取节点统计
-                entity_count = session.run(
-                    "MATCH (n:Entity) RETURN count(n) as count"
-                ).single()["count"]
-                time_count = session.run(
-                    "MATCH (n:Time) RETURN count(n) as count"
-                ).single()["count"]
-                location_count = session.run(
-                    "MATCH (n:Location) RETURN count(n) as count"
-                ).single()["count"]
+                entity_count = record["entity_count"]
+                time_count = record["time_count"]
+                location_count = record["location_count"]
 
                 # 获取关系统计
-                triple_rels = session.run(
-                    "MATCH ()-[r]->() WHERE r.predicate IS NOT NULL AND r.action IS NULL RETURN count(r) as count"
-                ).single()["count"]
-                quintuple_rels = session.run(
-                    "MATCH ()-[r]->() WHERE r.action IS NOT NULL RETURN count(r) as count"
-                ).single()["count"]
+                triple_rels = record["triple_rels"]
+                quintuple_rels = record["quintuple_rels"]
 
                 return {
                     "nodes": {
@@ -1824,12 +2009,17 @@ class KnowledgeGraphManager:
             logger.error(f"Failed to get statistics: {e}")
             return {"error": str(e)}
 
-    def delete_node_or_relation(self, element_ids: List[str]) -> Dict[str, Any]:
+    # 批量删除时最多保留的失败明细条数，超出部分只计入 failed_count
+    MAX_FAILED_ITEMS = 100
+
+    def delete_node_or_relation(self, element_ids: List[str], element_type: Optional[str] = None) -> Dict[str, Any]:
         """
         根据Neo4j元素ID批量删除节点或关系
 
         Args:
             element_ids: Neo4j元素ID列表（节点ID或关系ID）
+            element_type: 可选的类型提示，"node" 或 "relationship"；调用方已知类型时
+                只匹配对应一侧，省去另一侧的查找。为 None 时自动判断。
 
         Returns:
             {
@@ -1837,6 +2027,8 @@ class KnowledgeGraphManager:
               "error": Optional[str],
               "deleted_nodes": int,
               "deleted_relationships": int,
+              "failed_items": Optional[List[str]],  # 最多 MAX_FAILED_ITEMS 条
+              "failed_count": int,
             }
         """
         if not self._ensure_connection():
@@ -1856,104 +2048,107 @@ class KnowledgeGraphManager:
                 "deleted_relationships": 0,
             }
 
+        if element_type not in (None, "node", "relationship"):
+            return {
+                "success": False,
+                "error": f"Invalid element_type: {element_type}",
+                "deleted_nodes": 0,
+                "deleted_relationships": 0,
+            }
+
+        # 存在性检查、关系计数与删除在同一条语句内完成（节点 DETACH DELETE 会同时删除所有相关关系）
+        if element_type == "node":
+            delete_query = """
+            OPTIONAL MATCH (n) WHERE elementId(n) = $element_id
+            WITH n,
+                 n IS NOT NULL as is_node,
+                 false as is_relationship,
+                 CASE WHEN n IS NOT NULL THEN COUNT { (n)-[]-() } ELSE 0 END as rel_count
+            DETACH DELETE n
+            RETURN is_node, is_relationship, rel_count
+            """
+        elif element_type == "relationship":
+            delete_query = """
+            OPTIONAL MATCH ()-[r]->() WHERE elementId(r) = $element_id
+            WITH r,
+                 false as is_node,
+                 r IS NOT NULL as is_relationship,
+                 0 as rel_count
+            DELETE r
+            RETURN is_node, is_relationship, rel_count
+            """
+        else:
+            delete_query = """
+            OPTIONAL MATCH (n) WHERE elementId(n) = $element_id
+            OPTIONAL MATCH ()-[r]->() WHERE elementId(r) = $element_id
+            WITH n, r,
+                 n IS NOT NULL as is_node,
+                 r IS NOT NULL as is_relationship,
+                 CASE WHEN n IS NOT NULL THEN COUNT { (n)-[]-() } ELSE 0 END as rel_count
+            DETACH DELETE n
+            DELETE r
+            RETURN is_node, is_relationship, rel_count
+            """
+
         # 累计统计
         total_deleted_nodes = 0
         total_deleted_relationships = 0
+        # 失败明细最多保留 MAX_FAILED_ITEMS 条，超出部分只计数
         failed_items = []
+        failed_count = 0
+
+        def _record_failure(message: str) -> None:
+            nonlocal failed_count
+            failed_count += 1
+            if len(failed_items) < self.MAX_FAILED_ITEMS:
+                failed_items.append(message)
+
+        # 该操作可能删除节点，清空进程内节点缓存
+        self._invalidate_node_caches()
 
         try:
             with self.driver.session() as session:
                 for element_id in element_ids:
                     if not element_id or not element_id.strip():
-                        failed_items.append("Empty element ID")
+                        _record_failure("Empty element ID")
                         continue
                     
                     try:
-                        # 首先检查元素是否存在以及类型
-                        check_query = """
-                        OPTIONAL MATCH (n) WHERE elementId(n) = $element_id
-                        OPTIONAL MATCH ()-[r]-() WHERE elementId(r) = $element_id
-                        RETURN 
-                            CASE WHEN n IS NOT NULL THEN 'node' ELSE null END as node_type,
-                            CASE WHEN r IS NOT NULL THEN 'relationship' ELSE null END as rel_type,
-                            CASE WHEN n IS NOT NULL THEN labels(n) ELSE null END as node_labels,
-                            CASE WHEN n IS NOT NULL THEN n.name ELSE null END as node_name,
-                            CASE WHEN r IS NOT NULL THEN type(r) ELSE null END as rel_type_name
-                        """
+                        result = session.run(delete_query, element_id=element_id).single()
 
-                        check_result = session.run(check_query, element_id=element_id).single()
-
-                        if not check_result or (
-                            not check_result["node_type"] and not check_result["rel_type"]
-                        ):
-                            failed_items.append(f"Element '{element_id}' not found")
+                        if not result or (not result["is_node"] and not result["is_relationship"]):
+                            _record_failure(f"Element '{element_id}' not found")
                             continue
 
-                        # 删除节点（会自动删除相关关系）
-                        if check_result["node_type"]:
-                            # 获取删除前的关系数量
-                            rel_count_query = """
-                            MATCH (n)-[r]-() WHERE elementId(n) = $element_id
-                            RETURN count(r) as rel_count
-                            """
-                            rel_count = session.run(
-                                rel_count_query, element_id=element_id
-                            ).single()["rel_count"]
-
-                            # 删除节点（DETACH DELETE 会同时删除所有相关关系）
-                            delete_query = """
-                            MATCH (n) WHERE elementId(n) = $element_id
-                            DETACH DELETE n
-                            RETURN count(n) as deleted_count
-                            """
-
-                            result = session.run(delete_query, element_id=element_id)
-                            deleted_count = result.single()["deleted_count"]
-
-                            if deleted_count > 0:
-                                total_deleted_nodes += 1
-                                total_deleted_relationships += rel_count
-                                logger.info(
-                                    f"Successfully deleted node {element_id} and {rel_count} related relationships"
-                                )
-                            else:
-                                failed_items.append(f"Node '{element_id}' deletion failed")
-
-                        # 删除关系
-                        elif check_result["rel_type"]:
-                            # 删除关系
-                            delete_query = """
-                            MATCH ()-[r]-() WHERE elementId(r) = $element_id
-                            DELETE r
-                            RETURN count(r) as deleted_count
-                            """
-
-                            result = session.run(delete_query, element_id=element_id)
-                            deleted_count = result.single()["deleted_count"]
-
-                            if deleted_count > 0:
-                                total_deleted_relationships += 1
-                                logger.info(f"Successfully deleted relationship {element_id}")
-                            else:
-                                failed_items.append(f"Relationship '{element_id}' deletion failed")
+                        if result["is_node"]:
+                            rel_count = result["rel_count"]
+                            total_deleted_nodes += 1
+                            total_deleted_relationships += rel_count
+                            logger.info(
+                                f"Successfully deleted node {element_id} and {rel_count} related relationships"
+                            )
+                        else:
+                            total_deleted_relationships += 1
+                            logger.info(f"Successfully deleted relationship {element_id}")
                     
                     except Exception as item_error:
-                        failed_items.append(f"Element '{element_id}': {str(item_error)}")
+                        _record_failure(f"Element '{element_id}': {str(item_error)}")
                         logger.error(f"Failed to delete element '{element_id}': {item_error}")
 
                 # 构建返回结果
                 if total_deleted_nodes > 0 or total_deleted_relationships > 0:
                     message = f"成功删除 {total_deleted_nodes} 个节点和 {total_deleted_relationships} 个关系"
-                    if failed_items:
-                        message += f"，{len(failed_items)} 个项目失败"
+                    if failed_count:
+                        message += f"，{failed_count} 个项目失败"
                     
                     return {
                         "success": True,
-                        "error": None if not failed_items else f"{len(failed_items)} items failed",
+                        "error": None if not failed_count else f"{failed_count} items failed",
                         "deleted_nodes": total_deleted_nodes,
                         "deleted_relationships": total_deleted_relationships,
                         "message": message,
                         "failed_items": failed_items if failed_items else None,
+                        "failed_count": failed_count,
                     }
                 else:
                     return {
@@ -1962,6 +2157,7 @@ class KnowledgeGraphManager:
                         "deleted_nodes": 0,
                         "deleted_relationships": 0,
                         "failed_items": failed_items,
+                        "failed_count": failed_count,
                     }
 
         except Exception as e:
@@ -2092,7 +2288,9 @@ class KnowledgeGraphManager:
                     log_dir = os.path.join(project_root, "data", "memory_graph")
                     os.makedirs(log_dir, exist_ok=True)
                     
-                    log_filename = f"{datetime.now().strftime('%Y%m%d')}.jsonl"
+                    # 文件名与时间戳取同一时刻，避免跨零点时二者不一致
+                    now = datetime.now()
+                    log_filename = f"{now.strftime('%Y%m%d')}.jsonl"
                     log_file = os.path.join(log_dir, log_filename)
                     
                     # 过滤节点属性
@@ -2118,11 +2316,11 @@ class KnowledgeGraphManager:
                     log_entry = {
                         "nodes": filtered_nodes,
                         "relationships": filtered_relationships,
-                        "timestamp": datetime.now().isoformat(),
+                        "timestamp": now.isoformat(),
                     }
                     
-                    with open(log_file, "w", encoding="utf-8") as f:
-                        f.write(json.dumps(log_entry, ensure_ascii=False, indent=2) + "\n")
+                    with open(log_file, "wb") as f:
+                        f.write(_json_dumps_bytes(log_entry, indent=True) + b"\n")
                     
                     logger.info(f"记忆保存日志已写入: {log_file}")
                 except Exception as e:
@@ -2142,6 +2340,42 @@ class KnowledgeGraphManager:
             logger.error(f"保存记忆失败: {e}")
             return False
 
+    # upload_memory 批量更新已存在节点使用的语句：合并属性，并将标签整体替换为文件中的标签
+    _UPLOAD_UPDATE_NODES_QUERY = """
+    UNWIND $rows AS row
+    MATCH (n)
+    WHERE elementId(n) = row.node_id
+    SET n += row.properties
+    WITH n, row
+    CALL apoc.create.setLabels(n, row.labels) YIELD node
+    RETURN row.node_id as old_id
+    """
+
+    # upload_memory 批量创建节点使用的语句：标签经 apoc.create.node 以参数传入
+    _UPLOAD_CREATE_NODES_QUERY = """
+    UNWIND $rows AS row
+    CALL apoc.create.node(row.labels, row.properties) YIELD node
+    RETURN row.node_id as old_id, elementId(node) as id
+    """
+
+    # upload_memory 批量更新已存在关系使用的语句（按元素ID匹配）
+    _UPLOAD_UPDATE_RELATIONS_QUERY = """
+    UNWIND $rows AS row
+    MATCH ()-[r]->()
+    WHERE elementId(r) = row.rel_id
+    SET r += row.properties
+    RETURN row.rel_id as old_id
+    """
+
+    # upload_memory 批量创建关系使用的语句：关系类型经 apoc.create.relationship 以参数传入
+    _UPLOAD_CREATE_RELATIONS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (a), (b)
+    WHERE elementId(a) = row.start_id AND elementId(b) = row.end_id
+    CALL apoc.create.relationship(a, row.rel_type, row.properties, b) YIELD rel
+    RETURN row.rel_id as old_id, elementId(rel) as id
+    """
+
     def upload_memory(self, elements: Dict[str, Any]) -> bool:
         """
         将节点和关系数据加载到Neo4j数据库
@@ -2159,194 +2393,123 @@ class KnowledgeGraphManager:
         Returns:
             bool: 操作是否成功
         """
-        if not self._ensure_connection():
-            logger.error("Cannot upload memory: No Neo4j connection")
-            return False
-        
         if not isinstance(elements, dict):
             logger.error("Invalid input: elements must be a dictionary")
             return False
+
+        # 提取节点和关系数据；无数据时直接返回，无需检查连接
+        nodes_to_upload = elements.get("nodes", [])
+        all_relationships = elements.get("relationships", [])
+
+        if not nodes_to_upload and not all_relationships:
+            logger.warning("没有节点和关系数据")
+            return True
+
+        if not self._ensure_connection():
+            logger.error("Cannot upload memory: No Neo4j connection")
+            return False
+
+        # 已有节点的属性会被覆盖，命名节点缓存中的查重键随之失效
+        with self._node_cache_lock:
+            self._named_node_cache.clear()
         
         try:
-            # 提取节点和关系数据
-            nodes_to_upload = elements.get("nodes", [])
-            all_relationships = elements.get("relationships", [])
-            
-            if not nodes_to_upload and not all_relationships:
-                logger.warning("没有节点和关系数据")
-                return True
-            
-            # 构建关系字典，用于后续ID重映射
-            relationships_list = list(all_relationships)
-            
-            logger.info(f"从文件加载: {len(nodes_to_upload)} 个节点, {len(relationships_list)} 个关系")
+            logger.info(f"从文件加载: {len(nodes_to_upload)} 个节点, {len(all_relationships)} 个关系")
             
-            with self.driver.session() as session:
-                # 上传所有节点
-                added_count = 0
-                updated_count = 0
-                
-                for node in nodes_to_upload:
-                    old_node_id = node["id"]
-                    labels = node.get("labels", [])
-                    properties = node.get("properties", {})
-                    
-                    # 检查Neo4j中是否存在该ID的节点
-                    check_query = """
-                    MATCH (n)
-                    WHERE elementId(n) = $node_id
-                    RETURN elementId(n) as id, labels(n) as existing_labels
-                    """
-                    check_result = session.run(check_query, node_id=old_node_id)
-                    existing_node = check_result.single()
-                    
-                    if existing_node:
-                        # 节点已存在，更新属性和标签
-                        existing_labels = existing_node["existing_labels"]
-                        
-                        update_query = """
-                        MATCH (n)
-                        WHERE elementId(n) = $node_id
-                        SET n += $properties
-                        RETURN elementId(n) as id
-                        """
-                        session.run(update_query, node_id=old_node_id, properties=properties)
-                        
-                        # 处理标签：添加缺失的标签，移除多余的标签
-                        labels_to_add = [lbl for lbl in labels if lbl not in existing_labels]
-                        labels_to_remove = [lbl for lbl in existing_labels if lbl not in labels]
-                        
-                        if labels_to_add:
-                            add_labels_query = f"""
-                            MATCH (n)
-                            WHERE elementId(n) = $node_id
-                            SET n:{":".join(labels_to_add)}
-                            """
-                            session.run(add_labels_query, node_id=old_node_id)
-                        
-                        if labels_to_remove:
-                            for label in labels_to_remove:
-                                remove_label_query = f"""
-                                MATCH (n)
-                                WHERE elementId(n) = $node_id
-                                REMOVE n:{label}
-                                """
-                                session.run(remove_label_query, node_id=old_node_id)
-                        
-                        updated_count += 1
-                        logger.info(f"Updated node: {properties.get('name', 'Unknown')} (id: {old_node_id})")
-                    else:
-                        # 节点不存在，创建新节点并获取Neo4j生成的ID
-                        labels_str = ":".join(labels) if labels else "Entity"
-                        create_query = f"""
-                        CREATE (n:{labels_str})
-                        SET n = $properties
-                        RETURN elementId(n) as id
-                        """
-                        create_result = session.run(create_query, properties=properties)
-                        created_record = create_result.single()
-                        
-                        if created_record:
-                            new_node_id = created_record["id"]
-                            
-                            # 更新所有关系中引用该节点的ID
-                            for rel in relationships_list:
-                                if rel.get("start_node") == old_node_id:
-                                    rel["start_node"] = new_node_id
-                                if rel.get("end_node") == old_node_id:
-                                    rel["end_node"] = new_node_id
-                            
-                            added_count += 1
-                            logger.info(f"Created node: {properties.get('name', 'Unknown')} (old_id: {old_node_id}, new_id: {new_node_id})")
-                
-                # 上传所有关系（先验证节点存在性）
-                valid_relationships = []
-                for rel in relationships_list:
-                    start_node_id = rel.get("start_node")
-                    end_node_id = rel.get("end_node")
-                    
-                    check_nodes_query = """
-                    MATCH (a), (b)
-                    WHERE elementId(a) = $start_id AND elementId(b) = $end_id
-                    RETURN elementId(a) as start_id, elementId(b) as end_id
-                    """
-                    check_result = session.run(check_nodes_query, start_id=start_node_id, end_id=end_node_id)
-                    
-                    if check_result.single():
-                        valid_relationships.append(rel)
-                    else:
-                        logger.warning(
-                            f"关系 '{rel.get('id')}' 的节点不存在于Neo4j中 "
-                            f"(start: {start_node_id}, end: {end_node_id}), 跳过"
-                        )
-                
-                rel_added_count = 0
-                rel_updated_count = 0
-                
-                for rel in valid_relationships:
-                    old_rel_id = rel["id"]
-                    rel_type = rel.get("type", "RELATED_TO")
-                    start_node_id = rel.get("start_node")
-                    end_node_id = rel.get("end_node")
-                    properties = rel.get("properties", {})
-                    
-                    # 检查Neo4j中是否存在该ID的关系
-                    check_rel_query = """
-                    MATCH ()-[r]->()
-                    WHERE elementId(r) = $rel_id
-                    RETURN elementId(r) as id, type(r) as existing_type
-                    """
-                    check_rel_result = session.run(check_rel_query, rel_id=old_rel_id)
-                    existing_rel = check_rel_result.single()
-                    
-                    if existing_rel:
-                        # 关系已存在，更新属性
-                        update_rel_query = """
-                        MATCH ()-[r]->()
-                        WHERE elementId(r) = $rel_id
-                        SET r += $properties
-                        RETURN elementId(r) as id
-                        """
-                        update_result = session.run(update_rel_query, rel_id=old_rel_id, properties=properties)
-                        
-                        if update_result.single():
-                            rel_updated_count += 1
-                            logger.info(f"Updated relationship: {rel_type} (id: {old_rel_id})")
-                    else:
-                        # 关系不存在，创建新关系
-                        create_rel_query = f"""
-                        MATCH (a), (b)
-                        WHERE elementId(a) = $start_id AND elementId(b) = $end_id
-                        CREATE (a)-[r:{rel_type}]->(b)
-                        SET r = $properties
-                        RETURN elementId(r) as id
-                        """
-                        create_rel_result = session.run(
-                            create_rel_query, 
-                            start_id=start_node_id, 
-                            end_id=end_node_id, 
-                            properties=properties
-                        )
-                        created_rel_record = create_rel_result.single()
-                        
-                        if created_rel_record:
-                            rel_added_count += 1
-                            logger.info(f"Created relationship: {rel_type} (old_id: {old_rel_id}, new_id: {created_rel_record['id']})")
-                
-                logger.info("记忆已上传到Neo4j")
-                logger.info(f"  节点: 新增 {added_count} 个, 更新 {updated_count} 个")
-                logger.info(f"  关系: 新增 {rel_added_count} 个, 更新 {rel_updated_count} 个")
-                
-                skipped_rels = len(relationships_list) - len(valid_relationships)
-                if skipped_rels > 0:
-                    logger.warning(f"跳过 {skipped_rels} 个关系（节点不存在）")
-                
-                return True
+            # 上传所有节点：先批量更新已存在的节点，再批量创建其余节点
+            node_rows = [
+                {
+                    "node_id": node["id"],
+                    "labels": node.get("labels", []),
+                    "properties": node.get("properties", {}),
+                }
+                for node in nodes_to_upload
+            ]
+            node_names = {row["node_id"]: row["properties"].get("name", "Unknown") for row in node_rows}
+
+            def _upload_memory_tx(tx) -> tuple:
+                """节点与关系的更新/创建在同一写事务内完成，一次提交，失败整体回滚"""
+                updated_node_ids = set()
+                if node_rows:
+                    for record in tx.run(self._UPLOAD_UPDATE_NODES_QUERY, rows=node_rows):
+                        updated_node_ids.add(record["old_id"])
+
+                # 节点不存在，创建新节点（无标签时默认为Entity）并记录 旧节点ID -> 新建节点ID，用于关系端点重映射
+                node_rows_to_create = [
+                    {**row, "labels": row["labels"] or ["Entity"]}
+                    for row in node_rows
+                    if row["node_id"] not in updated_node_ids
+                ]
+                node_id_map: Dict[str, str] = {}
+                if node_rows_to_create:
+                    for record in tx.run(self._UPLOAD_CREATE_NODES_QUERY, rows=node_rows_to_create):
+                        node_id_map[record["old_id"]] = record["id"]
+
+                # 上传所有关系：先批量更新已存在的关系，再批量创建其余关系；
+                # 节点存在性由创建语句的 MATCH 直接判定，无需逐条预先校验
+                rel_rows = [
+                    {
+                        "rel_id": rel["id"],
+                        "rel_type": _sanitize_predicate(rel.get("type", "RELATED_TO")),
+                        "start_id": node_id_map.get(rel.get("start_node"), rel.get("start_node")),
+                        "end_id": node_id_map.get(rel.get("end_node"), rel.get("end_node")),
+                        "properties": rel.get("properties", {}),
+                    }
+                    for rel in all_relationships
+                ]
+
+                updated_rel_ids = set()
+                if rel_rows:
+                    for record in tx.run(self._UPLOAD_UPDATE_RELATIONS_QUERY, rows=rel_rows):
+                        updated_rel_ids.add(record["old_id"])
+
+                rows_to_create = [row for row in rel_rows if row["rel_id"] not in updated_rel_ids]
+                rel_id_map: Dict[str, str] = {}
+                if rows_to_create:
+                    for record in tx.run(self._UPLOAD_CREATE_RELATIONS_QUERY, rows=rows_to_create):
+                        rel_id_map[record["old_id"]] = record["id"]
+
+                return updated_node_ids, node_id_map, updated_rel_ids, rel_id_map, rows_to_create
+
+            updated_node_ids, node_id_map, updated_rel_ids, rel_id_map, rows_to_create = self.run_write(
+                _upload_memory_tx
+            )
+
+            # 事务提交后再输出明细日志，避免驱动重试时重复记录
+            for old_id in updated_node_ids:
+                logger.info(f"Updated node: {node_names.get(old_id)} (id: {old_id})")
+            for old_id, new_id in node_id_map.items():
+                logger.info(f"Created node: {node_names.get(old_id)} (old_id: {old_id}, new_id: {new_id})")
+            for old_id in updated_rel_ids:
+                logger.info(f"Updated relationship (id: {old_id})")
+            for old_id, new_id in rel_id_map.items():
+                logger.info(f"Created relationship (old_id: {old_id}, new_id: {new_id})")
+
+            skipped_rels = 0
+            for row in rows_to_create:
+                if row["rel_id"] not in rel_id_map:
+                    skipped_rels += 1
+                    logger.warning(
+                        f"关系 '{row['rel_id']}' 的节点不存在于Neo4j中 "
+                        f"(start: {row['start_id']}, end: {row['end_id']}), 跳过"
+                    )
+
+            logger.info("记忆已上传到Neo4j")
+            logger.info(f"  节点: 新增 {len(node_id_map)} 个, 更新 {len(updated_node_ids)} 个")
+            logger.info(f"  关系: 新增 {len(rel_id_map)} 个, 更新 {len(updated_rel_ids)} 个")
+
+            if skipped_rels > 0:
+                logger.warning(f"跳过 {skipped_rels} 个关系（节点不存在）")
+
+            return True
         
         except Exception as e:
             logger.error(f"上传记忆失败: {e}")
             return False
 
+    # clear_all_memory 每个删除事务处理的节点数
+    CLEAR_MEMORY_BATCH_SIZE = 10000
+
     def clear_all_memory(self) -> bool:
         """清空Neo4j中的全部记忆节点，彻底格式化记忆，无法回退
 
@@ -2397,6 +2560,9 @@ class KnowledgeGraphManager:
             logger.error("无法连接到Neo4j数据库")
             return False
 
+        # 该操作可能删除节点，清空进程内节点缓存
+        self._invalidate_node_caches()
+
         try:
             with self.driver.session() as session:
                 # 获取清空前的统计信息
@@ -2406,8 +2572,21 @@ class KnowledgeGraphManager:
                     total_rels = stats_before.get("relationships", {}).get("total", 0)
                     logger.info(f"清空前统计：{total_nodes} 个节点，{total_rels} 个关系")
 
-                # 删除所有关系和节点
-                result = session.run("MATCH (n) DETACH DELETE n")
+                # 删除所有关系和节点：分批提交，避免单个事务持有整个图谱造成内存与事务日志膨胀
+                record = session.run(
+                    """
+                    CALL apoc.periodic.iterate(
+                        'MATCH (n) RETURN n',
+                        'DETACH DELETE n',
+                        {batchSize: $batch_size, parallel: false}
+                    ) YIELD batches, total, failedBatches, errorMessages
+                    RETURN batches, total, failedBatches, errorMessages
+                    """,
+                    batch_size=self.CLEAR_MEMORY_BATCH_SIZE,
+                ).single()
+                if record["failedBatches"]:
+                    raise RuntimeError(f"{record['failedBatches']} 个批次删除失败: {record['errorMessages']}")
+                logger.info(f"分 {record['batches']} 批删除了 {record['total']} 个节点")
 
                 logger.info("Neo4j数据库已完全清空")
                 logger.warning(
@@ -2432,6 +2611,19 @@ class KnowledgeGraphManager:
             logger.error(f"清空操作失败：{e}")
             return False
 
+    def _write_query_records(self, query: str, to_item, path: str) -> int:
+        """
+        在独立 session 中执行只读查询，将每条记录经 to_item 转换后逐条写入 path
+        （记录之间以逗号换行分隔，供拼接进 JSON 数组），返回写入的记录数。
+        """
+        count = 0
+        with self.driver.session() as session, open(path, "wb") as f:
+            for record in session.run(query):
+                f.write(b",\n" if count else b"\n")
+                f.write(_json_dumps_bytes(to_item(record)))
+                count += 1
+        return count
+
     def download_neo4j_data(self) -> bool:
         """检查Neo4j连接并将数据下载到neo4j_memory.json文件
 
@@ -2447,6 +2639,8 @@ class KnowledgeGraphManager:
         logger.info("Neo4j连接正常，正在同步数据...")
         logger.info("Neo4j connection established, starting data download")
 
+        # 本次下载产生的临时文件；无论成功与否都在 finally 中清理（成功时 tmp_file 已被替换掉）
+        temp_paths: List[str] = []
         try:
             # 确保目录存在
             neo4j_memory_dir = os.path.join(os.path.dirname(__file__), "memory_graph")
@@ -2454,72 +2648,88 @@ class KnowledgeGraphManager:
 
             neo4j_memory_file = os.path.join(neo4j_memory_dir, "neo4j_memory.json")
 
-            with self.driver.session() as session:
-                # 加载所有节点
-                logger.info("正在下载节点数据...")
-                nodes_query = """
-                MATCH (n)
-                RETURN elementId(n) as id, labels(n) as labels, properties(n) as properties
-                """
-                nodes_result = session.run(nodes_query)
-                nodes = []
-
-                for record in nodes_result:
-                    node = {
-                        "id": str(record["id"]),
-                        "labels": record["labels"],
-                        "properties": dict(record["properties"]),
-                    }
-                    nodes.append(node)
+            # 节点与关系两个查询互不依赖：各自在独立线程/session 中边读取边写入分段临时文件，
+            # 不在内存中累积整个图谱；全部完成后拼接为完整 JSON 再替换原文件
+            tmp_file = neo4j_memory_file + ".tmp"
+            nodes_part = neo4j_memory_file + ".nodes.tmp"
+            rels_part = neo4j_memory_file + ".relationships.tmp"
+            temp_paths = [nodes_part, rels_part, tmp_file]
 
-                # 加载所有关系
-                logger.info("正在下载关系数据...")
-                relationships_query = """
-                MATCH (a)-[r]->(b)
-                RETURN elementId(r) as id, type(r) as type, elementId(a) as start_node, elementId(b) as end_node, properties(r) as properties
-                """
-                relationships_result = session.run(relationships_query)
-                relationships = []
+            nodes_query = """
+            MATCH (n)
+            RETURN elementId(n) as id, labels(n) as labels, properties(n) as properties
+            """
+            relationships_query = """
+            MATCH (a)-[r]->(b)
+            RETURN elementId(r) as id, type(r) as type, elementId(a) as start_node, elementId(b) as end_node, properties(r) as properties
+            """
 
-                for record in relationships_result:
-                    relationship = {
-                        "id": str(record["id"]),
-                        "type": record["type"],
-                        "start_node": str(record["start_node"]),
-                        "end_node": str(record["end_node"]),
-                        "properties": dict(record["properties"]),
-                    }
-                    relationships.append(relationship)
-
-                # 构建数据结构
-                neo4j_data = {
-                    "nodes": nodes,
-                    "relationships": relationships,
-                    "metadata": {
-                        "source": "neo4j",
-                        "neo4j_uri": config.grag.neo4j_uri,
-                        "neo4j_database": config.grag.neo4j_database,
-                    },
-                    "updated_at": __import__("datetime").datetime.now().isoformat(),
+            def _node_item(record) -> Dict[str, Any]:
+                return {
+                    "id": str(record["id"]),
+                    "labels": record["labels"],
+                    "properties": record["properties"],
                 }
 
-                # 保存到文件（覆盖模式）
-                with open(neo4j_memory_file, "w", encoding="utf-8") as f:
-                    json.dump(neo4j_data, f, ensure_ascii=False, indent=2)
+            def _relationship_item(record) -> Dict[str, Any]:
+                return {
+                    "id": str(record["id"]),
+                    "type": record["type"],
+                    "start_node": str(record["start_node"]),
+                    "end_node": str(record["end_node"]),
+                    "properties": record["properties"],
+                }
 
-                logger.info(f"Neo4j数据已保存到: {neo4j_memory_file}")
-                logger.info(f"下载统计: {len(nodes)} 个节点, {len(relationships)} 个关系")
+            logger.info("正在下载节点与关系数据...")
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                nodes_future = pool.submit(self._write_query_records, nodes_query, _node_item, nodes_part)
+                rels_future = pool.submit(self._write_query_records, relationships_query, _relationship_item, rels_part)
+                node_count = nodes_future.result()
+                rel_count = rels_future.result()
+
+            metadata = {
+                "source": "neo4j",
+                "neo4j_uri": config.grag.neo4j_uri,
+                "neo4j_database": config.grag.neo4j_database,
+            }
+            with open(tmp_file, "wb") as f:
+                f.write(b'{"nodes": [')
+                with open(nodes_part, "rb") as part:
+                    shutil.copyfileobj(part, f)
+                f.write(b'\n],\n"relationships": [')
+                with open(rels_part, "rb") as part:
+                    shutil.copyfileobj(part, f)
+                # 写入元数据并闭合 JSON 对象
+                f.write(b'\n],\n"metadata": ')
+                f.write(_json_dumps_bytes(metadata))
+                f.write(b',\n"updated_at": ')
+                f.write(_json_dumps_bytes(datetime.now().isoformat()))
+                f.write(b"}\n")
+
+            # 保存到文件（覆盖模式）：完整写出后再替换，下载中途失败不会破坏原文件
+            os.replace(tmp_file, neo4j_memory_file)
+
+            logger.info(f"Neo4j数据已保存到: {neo4j_memory_file}")
+            logger.info(f"下载统计: {node_count} 个节点, {rel_count} 个关系")
 
-                logger.info(
-                    f"Neo4j data successfully downloaded to {neo4j_memory_file}: {len(nodes)} nodes, {len(relationships)} relationships"
-                )
-                return True
+            logger.info(
+                f"Neo4j data successfully downloaded to {neo4j_memory_file}: {node_count} nodes, {rel_count} relationships"
+            )
+            return True
 
         except Exception as e:
             logger.error(f"Failed to load Neo4j data: {e}")
             logger.error(f"Neo4j数据下载失败: {e}")
             return False
 
+        finally:
+            for path in temp_paths:
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    logger.warning(f"临时文件清理失败 {path}: {e}")
+
     def upload_memory_package(self, memory_data: Dict[str, Any]) -> Dict[str, Any]:
         """将一组节点和关系批量写入Neo4j图谱。
         
@@ -2533,19 +2743,43 @@ class KnowledgeGraphManager:
         Returns:
             {"nodes": [...], "relations": [...]} 处理结果
         """
+        nodes_list = memory_data.get("nodes", [])
+        relations_list = memory_data.get("relations", [])
+
+        # 空记忆包无需检查连接或开启事务
+        if not nodes_list and not relations_list:
+            return {"nodes": [], "relations": []}
+
         if not self._ensure_connection():
             logger.warning("Neo4j未连接，跳过记忆上传")
             return {"nodes": [], "relations": []}
-
-        nodes_list = memory_data.get("nodes", [])
-        relations_list = memory_data.get("relations", [])
         
-        logger.debug(f"记忆存储接收到数据: {json.dumps(memory_data, ensure_ascii=False, indent=2)}")
+        # 整包序列化开销较大，仅在开启DEBUG时进行
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"记忆存储接收到数据: {json.dumps(memory_data, ensure_ascii=False, indent=2)}")
         logger.info(f"处理 {len(nodes_list)} 个节点和 {len(relations_list)} 个关系")
         
         try:
-            with self.driver.session() as session:
-                tx = session.begin_transaction()
+            # 包内临时节点ID -> 实际Neo4j节点ID，节点处理完毕后统一改写关系端点
+            node_id_map: Dict[str, str] = {}
+            # 本包已创建的命名节点：(node_type, name, context) -> 节点ID
+            created_named_nodes: Dict[tuple, str] = {}
+
+            with self.batch() as tx:
+                # 一次查询确认所有节点是否已存在于图谱中，避免逐个节点往返（无节点时跳过查询）
+                node_ids = [node.get("nodeId") for node in nodes_list if node.get("nodeId")]
+                existing_node_ids = {
+                    record["existing_id"]
+                    for record in tx.run(
+                        """
+                        UNWIND $node_ids AS node_id
+                        MATCH (n) WHERE elementId(n) = node_id
+                        RETURN elementId(n) as existing_id
+                        """,
+                        node_ids=node_ids,
+                    )
+                } if node_ids else set()
+
                 # 遍历nodelist，处理节点
                 for node in nodes_list:
                     try:
@@ -2557,14 +2791,7 @@ class KnowledgeGraphManager:
                             logger.warning(f"Node missing required fields: {node}")
                             continue
                         
-                        # 检查节点是否已存在于图谱中
-                        check_query = """
-                        OPTIONAL MATCH (n) WHERE elementId(n) = $node_id
-                        RETURN elementId(n) as existing_id
-                        """
-                        
-                        check_result = tx.run(check_query, node_id=node_id).single()
-                        existing_node_id = check_result["existing_id"] if check_result else None
+                        existing_node_id = node_id if node_id in existing_node_ids else None
                         
                         if existing_node_id:
                             # 节点存在，调用modify_node修改节点属性
@@ -2587,27 +2814,22 @@ class KnowledgeGraphManager:
                                 )
                                 if new_node_id:
                                     logger.info(f"Created new Time node: {node_id} -> {new_node_id}")
-                                    old_node_id = node["nodeId"]
+                                    node_id_map[node["nodeId"]] = new_node_id
                                     node["nodeId"] = new_node_id
-                                    for relation in relations_list:
-                                        if relation.get("startNode") == old_node_id:
-                                            relation["startNode"] = new_node_id
-                                        if relation.get("endNode") == old_node_id:
-                                            relation["endNode"] = new_node_id
                                 else:
                                     logger.warning(f"Failed to create Time node: {node_id}")
                                 continue
                             
                             if updates:
-                                result = self.modify_node(existing_node_id, updates)
+                                result = self.modify_node(existing_node_id, updates, tx=tx)
                                 if result and result != "InvalidModification":
                                     logger.info(f"Updated existing node: {node_id}")
                                 elif result == "InvalidModification":
                                     # 修改被拒绝，回退到创建新节点
                                     logger.warning(f"Modify rejected for node {node_id}, falling back to create new node")
-                                    fallback_time = node_info.get("time_str", node_info.get("time", []))
-                                    if isinstance(fallback_time, str):
-                                        fallback_time = [t.strip() for t in fallback_time.split(",") if t.strip()] if fallback_time else []
+                                    fallback_time = _split_time_components(
+                                        node_info.get("time_str", node_info.get("time", []))
+                                    )
                                     new_node_id = self.create_node(
                                         session=tx,
                                         name=node_info.get("character_name", node_info.get("location_name", node_info.get("entity_name", node_info.get("name", "")))),
@@ -2620,47 +2842,47 @@ class KnowledgeGraphManager:
                                     )
                                     if new_node_id:
                                         logger.info(f"Fallback created new {node_type} node: {node_id} -> {new_node_id}")
-                                        old_node_id = node["nodeId"]
+                                        node_id_map[node["nodeId"]] = new_node_id
                                         node["nodeId"] = new_node_id
-                                        for relation in relations_list:
-                                            if relation.get("startNode") == old_node_id:
-                                                relation["startNode"] = new_node_id
-                                            if relation.get("endNode") == old_node_id:
-                                                relation["endNode"] = new_node_id
                                     else:
                                         logger.warning(f"Fallback create also failed for {node_type} node: {node_id}")
                                 else:
                                     logger.warning(f"Failed to update node: {node_id}")
                         else:
                             # 节点不存在，调用create_node创建节点
-                            create_time = node_info.get("time_str", node_info.get("time", []))
-                            if isinstance(create_time, str):
-                                create_time = [t.strip() for t in create_time.split(",") if t.strip()] if create_time else []
-                            new_node_id = self.create_node(
-                                session=tx,
-                                name=node_info.get("character_name", node_info.get("location_name", node_info.get("entity_name", node_info.get("name", "")))),
-                                node_type=node_type,
-                                time_str=create_time,
-                                time_type=node_info.get("time_type", "static"),
-                                trust=node_info.get("trust", 0.5),
-                                context=node_info.get("context", "reality现实"),
-                                note=node_info.get("note", "无")
+                            create_time = _split_time_components(
+                                node_info.get("time_str", node_info.get("time", []))
+                            )
+                            create_name = node_info.get("character_name", node_info.get("location_name", node_info.get("entity_name", node_info.get("name", ""))))
+                            create_context = node_info.get("context", "reality现实")
+
+                            # 同一包内重复出现的命名节点只创建一次（避免重复 MERGE 与 embedding 生成）
+                            named_key = (
+                                (node_type, create_name.strip(), create_context)
+                                if node_type in self.NAMED_NODE_LABELS and create_name and create_name.strip()
+                                else None
                             )
+                            new_node_id = created_named_nodes.get(named_key) if named_key else None
+                            if not new_node_id:
+                                new_node_id = self.create_node(
+                                    session=tx,
+                                    name=create_name,
+                                    node_type=node_type,
+                                    time_str=create_time,
+                                    time_type=node_info.get("time_type", "static"),
+                                    trust=node_info.get("trust", 0.5),
+                                    context=create_context,
+                                    note=node_info.get("note", "无")
+                                )
+                                if new_node_id and named_key:
+                                    created_named_nodes[named_key] = new_node_id
                             
                             if new_node_id:
                                 logger.info(f"Created new {node_type} node: {node_id} -> {new_node_id}")
                                 
                                 # 更新当前节点的ID为实际的Neo4j节点ID
-                                old_node_id = node["nodeId"]
+                                node_id_map[node["nodeId"]] = new_node_id
                                 node["nodeId"] = new_node_id
-                                
-                                # 更新relations_list中所有引用这个节点的关系
-                                for relation in relations_list:
-                                    if relation.get("startNode") == old_node_id:
-                                        relation["startNode"] = new_node_id
-                                    
-                                    if relation.get("endNode") == old_node_id:
-                                        relation["endNode"] = new_node_id
                             else:
                                 logger.warning(f"Failed to create {node_type} node: {node_id}")
                                 
@@ -2668,11 +2890,42 @@ class KnowledgeGraphManager:
                         logger.error(f"Error processing node {node}: {e}")
                         continue
 
-                # 先提交节点事务，确保新节点对后续 create_relation/modify_relation 的独立 session 可见
-                tx.commit()
-                logger.info(f"节点事务已提交: {len(nodes_list)} 个节点")
+            # 节点事务在 batch 退出时提交，确保新节点对后续 create_relation/modify_relation 的独立 session 可见
+            logger.info(f"节点事务已提交: {len(nodes_list)} 个节点")
+
+            # 更新relations_list中所有引用新节点的关系（单次遍历）
+            if node_id_map:
+                for relation in relations_list:
+                    relation["startNode"] = node_id_map.get(relation.get("startNode"), relation.get("startNode"))
+                    relation["endNode"] = node_id_map.get(relation.get("endNode"), relation.get("endNode"))
+
+            with self.driver.session() as session:
+                # 一次查询确认所有关系是否已存在（须连接相同的起止节点），避免逐条关系往返（无关系时跳过查询）
+                relation_refs = [
+                    {
+                        "relation_id": relation.get("relationId"),
+                        "start_id": relation.get("startNode"),
+                        "end_id": relation.get("endNode"),
+                    }
+                    for relation in relations_list
+                    if relation.get("relationId")
+                ]
+                existing_relation_ids = {
+                    record["existing_relation_id"]
+                    for record in session.run(
+                        """
+                        UNWIND $relations AS rel
+                        MATCH (a)-[r]->(b)
+                        WHERE elementId(r) = rel.relation_id
+                          AND elementId(a) = rel.start_id AND elementId(b) = rel.end_id
+                        RETURN elementId(r) as existing_relation_id
+                        """,
+                        relations=relation_refs,
+                    )
+                } if relation_refs else set()
 
                 # 遍历relationlist，处理关系（使用独立 session，节点已持久化）
+                pending_relations: List[Dict[str, Any]] = []
                 for relation in relations_list:
                     try:
                         relation_id = relation.get("relationId")
@@ -2696,20 +2949,7 @@ class KnowledgeGraphManager:
                             logger.warning(f"Could not resolve node IDs for relation {relation_id}: {start_node_id} -> {end_node_id}")
                             continue
                         
-                        # 检查关系是否已存在
-                        check_relation_query = """
-                        OPTIONAL MATCH (a)-[r]->(b) 
-                        WHERE elementId(a) = $start_id AND elementId(b) = $end_id 
-                        AND elementId(r) = $relation_id
-                        RETURN elementId(r) as existing_relation_id
-                        """
-                        
-                        check_relation_result = session.run(check_relation_query, 
-                                                       start_id=start_node_id,
-                                                       end_id=end_node_id,
-                                                       relation_id=relation_id).single()
-                        
-                        existing_relation_id = check_relation_result["existing_relation_id"] if check_relation_result else None
+                        existing_relation_id = relation_id if relation_id in existing_relation_ids else None
                         
                         if existing_relation_id:
                             # 关系存在，调用modify_relation修改关系属性
@@ -2719,21 +2959,24 @@ class KnowledgeGraphManager:
                             else:
                                 logger.warning(f"Failed to update relation: {relation_id}")
                         else:
-                            # 关系不存在，调用create_relation创建关系
-                            new_relation_id = self.create_relation(
-                                startNode_id=start_node_id,
-                                endNode_id=end_node_id,
-                                predicate=predicate,
-                                source=source,
-                                confidence=confidence,
-                                importance=importance,
-                                directivity=relation_type,
-                                evidence=evidence
-                            )
+                            # 关系不存在，收集后统一批量创建
+                            pending_relations.append({
+                                "startNode_id": start_node_id,
+                                "endNode_id": end_node_id,
+                                "predicate": predicate,
+                                "source": source,
+                                "confidence": confidence,
+                                "importance": importance,
+                                "directivity": relation_type,
+                                "evidence": evidence,
+                            })
                                 
                     except Exception as e:
                         logger.error(f"Error processing relation {relation}: {e}")
                         continue
+
+                if pending_relations:
+                    self.create_relations_bulk(pending_relations)
                 
                 logger.info(f"Memory record processing completed: {len(nodes_list)} nodes, {len(relations_list)} relations")
                 
@@ -2763,7 +3006,8 @@ class KnowledgeGraphManager:
                 return {"nodes": processed_nodes, "relations": processed_relations}
                 
         except Exception as e:
-            # 事务未提交时，session 关闭会自动回滚未提交的事务
+            # 事务未提交时，session 关闭会自动回滚未提交的事务；回滚的节点不可再被缓存复用
+            self._invalidate_node_caches()
             logger.error(f"记忆记录处理出错，事务已回滚: {e}")
             return {"nodes": [], "relations": []}
 
@@ -2779,31 +3023,89 @@ class KnowledgeGraphManager:
         if not relation_ids:
             return True
 
+        def _note_memory_used_tx(tx) -> int:
+            record = tx.run(
+                """
+                UNWIND $rel_ids AS rid
+                MATCH ()-[r]->()
+                WHERE elementId(r) = rid AND r.significance IS NOT NULL
+                SET r.significance = 1.0,
+                    r.importance = CASE
+                        WHEN r.importance IS NOT NULL AND r.importance <= 0.95
+                        THEN r.importance + 0.01
+                        ELSE r.importance
+                    END
+                RETURN count(r) as updated_count
+                """,
+                rel_ids=relation_ids,
+            ).single()
+            return record["updated_count"]
+
         try:
-            with self.driver.session() as session:
-                result = session.run(
-                    """
-                    UNWIND $rel_ids AS rid
-                    MATCH ()-[r]->()
-                    WHERE elementId(r) = rid AND r.significance IS NOT NULL
-                    SET r.significance = 1.0,
-                        r.importance = CASE
-                            WHEN r.importance IS NOT NULL AND r.importance <= 0.95
-                            THEN r.importance + 0.01
-                            ELSE r.importance
-                        END
-                    RETURN count(r) as updated_count
-                    """,
-                    rel_ids=relation_ids,
-                )
-                updated = result.single()["updated_count"]
-                logger.debug(f"记忆调用标记完成: {updated}/{len(relation_ids)} 个关系已更新")
-                return True
+            updated = self.run_write(_note_memory_used_tx)
+            logger.debug(f"记忆调用标记完成: {updated}/{len(relation_ids)} 个关系已更新")
+            return True
 
         except Exception as e:
             logger.error(f"记忆调用标记失败: {e}")
             return False
 
+    def note_memory_used_deferred(self, relation_ids: list[str]) -> None:
+        """
+        note_memory_used 的写回版本：仅登记relation ID并立即返回，
+        由后台定时器在 MEMORY_USED_FLUSH_DELAY 秒后合并为一次批量写入。
+        同一窗口内重复调用的关系只记一次。
+        """
+        if not relation_ids:
+            return
+
+        with self._pending_used_lock:
+            self._pending_used_relations.update(relation_ids)
+            self._schedule_used_flush(self.MEMORY_USED_FLUSH_DELAY)
+
+    def _schedule_used_flush(self, delay: float) -> None:
+        """在 delay 秒后触发 flush_memory_used；已有定时器等待时不重复安排。调用方须持有 _pending_used_lock"""
+        if self._pending_used_timer is None:
+            timer = threading.Timer(delay, self.flush_memory_used)
+            timer.daemon = True
+            self._pending_used_timer = timer
+            timer.start()
+
+    def flush_memory_used(self, retry_on_failure: bool = True) -> bool:
+        """
+        立即写入所有待写回的记忆调用标记（定时器触发或关闭连接前调用）。
+        写入经 run_write 使用短生命周期 session；失败时将这些 ID 放回待写回集合，
+        并按退避间隔（每次翻倍，最长 MEMORY_USED_RETRY_MAX_DELAY 秒）重新安排定时器重试，不会丢失。
+
+        Args:
+            retry_on_failure: 失败时是否安排重试定时器（关闭连接时传 False）
+        """
+        with self._pending_used_lock:
+            if self._pending_used_timer is not None:
+                self._pending_used_timer.cancel()
+                self._pending_used_timer = None
+            relation_ids = list(self._pending_used_relations)
+            self._pending_used_relations.clear()
+
+        if not relation_ids:
+            return True
+
+        if self.note_memory_used(relation_ids):
+            with self._pending_used_lock:
+                self._pending_used_retry_delay = self.MEMORY_USED_FLUSH_DELAY
+            return True
+
+        with self._pending_used_lock:
+            self._pending_used_relations.update(relation_ids)
+            if not retry_on_failure:
+                logger.warning(f"记忆调用标记写回失败，{len(relation_ids)} 个关系未能写入")
+                return False
+            retry_delay = self._pending_used_retry_delay
+            self._pending_used_retry_delay = min(retry_delay * 2, self.MEMORY_USED_RETRY_MAX_DELAY)
+            self._schedule_used_flush(retry_delay)
+        logger.warning(f"记忆调用标记写回失败，{len(relation_ids)} 个关系将在 {retry_delay:.0f} 秒后重试")
+        return False
+
     def _get_checkpoint_date(self) -> Optional[str]:
         """
         从本地JSON文件读取全局checkpoint日期字符串（格式 YYYYMMDD）。
@@ -2868,7 +3170,8 @@ class KnowledgeGraphManager:
             logger.error("Cannot run daily checkpoint: No Neo4j connection")
             return False
 
-        today_str = datetime.now().strftime("%Y%m%d")
+        now = datetime.now()
+        today_str = now.strftime("%Y%m%d")
         checkpoint_date = self._get_checkpoint_date()
 
         if checkpoint_date == today_str:
@@ -2885,7 +3188,7 @@ class KnowledgeGraphManager:
                 )
                 nodes = []
                 for record in nodes_result:
-                    props = dict(record["properties"])
+                    props = record["properties"]
                     props.pop("embedding", None)  # 去掉embedding大字段
                     nodes.append({
                         "id": str(record["id"]),
@@ -2908,7 +3211,7 @@ class KnowledgeGraphManager:
                         "type": record["type"],
                         "start_node": str(record["start_node"]),
                         "end_node": str(record["end_node"]),
-                        "properties": dict(record["properties"]),
+                        "properties": record["properties"],
                     })
 
             # 写入文件
@@ -2920,10 +3223,10 @@ class KnowledgeGraphManager:
             log_entry = {
                 "nodes": nodes,
                 "relationships": relationships,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
             }
-            with open(log_file, "w", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False, indent=2) + "\n")
+            with open(log_file, "wb") as f:
+                f.write(_json_dumps_bytes(log_entry, indent=True) + b"\n")
 
             logger.info(f"Checkpoint snapshot saved: {log_file} ({len(nodes)} nodes, {len(relationships)} relationships)")
 
@@ -2940,15 +3243,28 @@ class KnowledgeGraphManager:
         return True
 
 
-# 全局实例
+# 全局实例：进程内所有调用方共用同一个管理器（及其驱动连接池）
 _kg_manager = None
+_kg_manager_lock = threading.Lock()
+
+
+def _shutdown_knowledge_graph_manager():
+    """进程退出时写回缓冲的使用标记并关闭驱动"""
+    if _kg_manager is not None:
+        try:
+            _kg_manager.disconnect()
+        except Exception as e:
+            logger.debug(f"Failed to disconnect knowledge graph manager at exit: {e}")
 
 
 def get_knowledge_graph_manager() -> KnowledgeGraphManager:
-    """获取知识图谱管理器单例"""
+    """获取知识图谱管理器单例（线程安全，首次调用时惰性创建）"""
     global _kg_manager
     if _kg_manager is None:
-        _kg_manager = KnowledgeGraphManager()
+        with _kg_manager_lock:
+            if _kg_manager is None:
+                _kg_manager = KnowledgeGraphManager()
+                atexit.register(_shutdown_knowledge_graph_manager)
     return _kg_manager
 
 def clear_all_memory_interactive() -> bool:
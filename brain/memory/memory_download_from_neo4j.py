@@ -83,7 +83,13 @@ class Neo4jConnector:
             self.driver = GraphDatabase.driver(
                 uri, 
                 auth=(user, password),
-                database=database
+                database=database,
+                # 与 KnowledgeGraphManager 共用同一套连接池配置
+                max_connection_lifetime=config.grag.neo4j_max_lifetime,
+                max_connection_pool_size=config.grag.neo4j_max_pool_size,
+                connection_acquisition_timeout=config.grag.neo4j_acquisition_timeout,
+                keep_alive=True,
+                connection_timeout=5,  # 5 seconds
             )
             
             # 测试连接
@@ -132,7 +138,7 @@ class Neo4jConnector:
                     node = GraphNode(
                         id=str(record["id"]),
                         labels=record["labels"],
-                        properties=dict(record["properties"])
+                        properties=record["properties"]
                     )
                     nodes.append(node)
                     
@@ -167,7 +173,7 @@ class Neo4jConnector:
                         type=record["type"],
                         start_node=str(record["start_node"]),
                         end_node=str(record["end_node"]),
-                        properties=dict(record["properties"])
+                        properties=record["properties"]
                     )
                     relationships.append(relationship)
                     
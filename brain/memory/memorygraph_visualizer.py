@@ -7,6 +7,7 @@ Memory Graph Viewer
 """
 
 import os
+import re
 import sys
 import json
 import logging
@@ -34,6 +35,17 @@ from brain.memory.knowledge_graph_manager import load_neo4j_data_to_file, get_kn
 
 logger = logging.getLogger(__name__)
 
+# 可选依赖：优先使用 orjson 解析导出的图谱文件（C 实现，大文件解析更快）
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 时间组件字符串的分隔符（兼容中英文逗号）
+_TIME_COMPONENT_SPLIT_RE = re.compile(r'[,，]')
+
 class MemoryGraphViewer:
     """记忆图谱HTML可视化器"""
     
@@ -52,7 +64,7 @@ class MemoryGraphViewer:
                 with open(self.neo4j_memory_file, 'r', encoding='utf-8') as f:
                     content = f.read().strip()
                     if content:
-                        self.neo4j_data = json.loads(content)
+                        self.neo4j_data = _json_loads(content)
                         logger.info(f"Loaded neo4j memory data: {len(self.neo4j_data.get('nodes', []))} nodes")
                     else:
                         self.neo4j_data = {"nodes": [], "relationships": []}
@@ -601,8 +613,7 @@ def start_api_server():
                 
                 # 兼容字符串输入：自动按逗号拆分为列表
                 if isinstance(time_str, str):
-                    import re as _re
-                    time_str = [s.strip() for s in _re.split(r'[,，]', time_str) if s.strip()]
+                    time_str = [s.strip() for s in _TIME_COMPONENT_SPLIT_RE.split(time_str) if s.strip()]
                 
                 if not time_str:
                     return jsonify({
@@ -787,6 +798,8 @@ def start_api_server():
                 
                 data = request.get_json()
                 element_ids = data.get('element_ids', [])
+                # 可选类型提示："node" / "relationship"，前端已知类型时可省去另一侧的查找
+                element_type = data.get('element_type')
                 
                 if not element_ids or not isinstance(element_ids, list):
                     return jsonify({
@@ -795,7 +808,7 @@ def start_api_server():
                     }), 400
                 
                 # 批量删除
-                result = kg_manager.delete_node_or_relation(element_ids)
+                result = kg_manager.delete_node_or_relation(element_ids, element_type)
                 
                 if result["success"]:
                     return jsonify(result), 200
@@ -1155,7 +1168,7 @@ def start_api_server():
                             "error": "文件内容为空"
                         }), 400
                     try:
-                        memory_data = json.loads(content)
+                        memory_data = _json_loads(content)
                     except json.JSONDecodeError as e:
                         return jsonify({
                             "success": False,
@@ -43,6 +43,106 @@ client = OpenAI(
 
 logger = logging.getLogger(__name__)
 
+# 按名称精确匹配节点：所有关键词一次查询，每个关键词按标签逐一匹配以命中各标签上的 name 属性索引
+# （不带标签的 MATCH 会全库扫描）；使用 UNION ALL 免去逐行比较去重，多标签节点的重复结果由调用方按节点ID去重
+_EXACT_NAME_MATCH_QUERY = (
+    "UNWIND $keywords AS keyword\nCALL {\n"
+    + "\nUNION ALL\n".join(
+        f"WITH keyword MATCH (n:{label} {{name: keyword}}) RETURN n"
+        for label in (*KnowledgeGraphManager.NAMED_NODE_LABELS, "Time")
+    )
+    + "\n}\nRETURN keyword, elementId(n) as id, labels(n) as labels, properties(n) as properties"
+)
+
+
+def _exact_match_nodes(session, keywords: List[str]) -> Dict[str, list]:
+    """批量精确匹配关键词，返回 {关键词: [匹配记录, ...]}（无匹配的关键词不出现在结果中）"""
+    matches: Dict[str, list] = {}
+    if not keywords:
+        return matches
+    for record in session.run(_EXACT_NAME_MATCH_QUERY, keywords=keywords):
+        matches.setdefault(record["keyword"], []).append(record)
+    return matches
+
+
+def _online_vector_index_names(session) -> List[str]:
+    """
+    返回已创建且处于 ONLINE 状态的向量索引名（按 VECTOR_INDEX_DEFINITIONS 顺序）。
+    多个索引在同一条语句中查询时，任一索引缺失（如新库尚未建好）或未就绪都会使整条语句失败，
+    因此先过滤掉这些索引，保证单个索引的问题只丢失该索引的结果。
+    """
+    try:
+        online = {
+            record["name"]
+            for record in session.run(
+                "SHOW INDEXES YIELD name, type, state "
+                "WHERE type = 'VECTOR' AND state = 'ONLINE' RETURN name"
+            )
+        }
+    except Exception as e:
+        logger.warning(f"查询向量索引状态失败: {e}")
+        return []
+
+    index_names = []
+    for index_name, _label in KnowledgeGraphManager.VECTOR_INDEX_DEFINITIONS:
+        if index_name in online:
+            index_names.append(index_name)
+        else:
+            logger.warning(f"向量索引 {index_name} 不存在或未就绪，跳过")
+    return index_names
+
+
+# 向量语义匹配：所有关键词 × 所有向量索引一次查询，每个索引每个关键词最多取 5 个；
+# 排序与截断在库内完成：同一节点取最高分，每个关键词按相似度降序只返回前 5 个
+_SEMANTIC_MATCH_QUERY = """
+UNWIND $rows AS row
+UNWIND $index_names AS index_name
+CALL db.index.vector.queryNodes(index_name, 5, row.embedding)
+YIELD node, score
+WHERE score > $similarity_threshold
+WITH row.keyword AS keyword, node, max(score) AS similarity
+ORDER BY similarity DESC
+WITH keyword, collect({node: node, similarity: similarity})[..5] AS hits
+UNWIND hits AS hit
+RETURN keyword, elementId(hit.node) as id, labels(hit.node) as labels,
+       properties(hit.node) as properties, hit.similarity as similarity
+"""
+
+
+def _semantic_match_nodes(session, keywords: List[str]) -> Dict[str, list]:
+    """
+    批量向量匹配关键词，返回 {关键词: [匹配记录, ...]}，每个关键词的记录已按相似度降序且最多 5 条。
+    向量生成失败的关键词不出现在结果中；生成成功但无匹配的关键词对应空列表。
+    """
+    matches: Dict[str, list] = {}
+    if not keywords:
+        return matches
+
+    rows = [
+        {"keyword": keyword, "embedding": embedding}
+        for keyword, embedding in zip(keywords, generate_embeddings(keywords))
+        if embedding
+    ]
+    if not rows:
+        return matches
+
+    for row in rows:
+        matches[row["keyword"]] = []
+    index_names = _online_vector_index_names(session)
+    if not index_names:
+        return matches
+    try:
+        for record in session.run(
+            _SEMANTIC_MATCH_QUERY,
+            rows=rows,
+            index_names=index_names,
+            similarity_threshold=config.grag.similarity_threshold,
+        ):
+            matches[record["keyword"]].append(record)
+    except Exception as e:
+        logger.warning(f"向量索引查询失败: {e}")
+    return matches
+
 
 def load_prompt_file(filename: str, description: str = "") -> str:
     """
@@ -102,6 +202,41 @@ def generate_embedding(text: str) -> Optional[List[float]]:
         logger.error(f"Failed to generate embedding: {e}")
         return None
 
+def generate_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    一次接口调用批量生成多条文本的向量
+    
+    Args:
+        texts: 要计算向量的文本列表
+        
+    Returns:
+        List[Optional[List[float]]]: 与 texts 一一对应的向量，失败（或文本为空）的位置为None
+    """
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    valid = [(i, text) for i, text in enumerate(texts) if text and text.strip()]
+    if not valid:
+        return embeddings
+        
+    try:
+        logger.debug(f"Generating {len(valid)} embeddings in one request")
+        response = client.embeddings.create(
+            input=[text for _, text in valid],
+            model=EMB_MODEL,
+            dimensions=384,
+        )
+        
+        if response and response.data:
+            # 按返回的 index 对齐输入顺序
+            for item in response.data:
+                embeddings[valid[item.index][0]] = item.embedding
+        else:
+            logger.error("Embedding API returned empty response")
+            
+    except Exception as e:
+        logger.error(f"Failed to generate embeddings: {e}")
+        
+    return embeddings
+
 def search_nodes_by_embedding(text: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """
     通过embedding向量相似度搜索节点
@@ -129,38 +264,43 @@ def search_nodes_by_embedding(text: str, top_k: int = 5) -> List[Dict[str, Any]]
             logger.error("无法生成embedding向量")
             return []
         
-        # 使用Neo4j原生向量索引搜索（需要预先创建向量索引）
+        # 使用Neo4j原生向量索引搜索（需要预先创建向量索引）：所有向量索引在一次查询中遍历，
+        # 同一节点取最高分，按相似度降序取 top_k 均在库内完成
         with kg_manager.driver.session() as session:
             matches = []
-            seen_ids = set()
             
-            # 遍历所有向量索引查询，合并结果
-            for index_name, _label in KnowledgeGraphManager.VECTOR_INDEX_DEFINITIONS:
-                try:
-                    query = """
-                    CALL db.index.vector.queryNodes($index_name, $top_k, $query_embedding)
-                    YIELD node, score
-                    WHERE score > $similarity_threshold
-                    RETURN elementId(node) as id, node.name as name, score as similarity
-                    """
-                    results = session.run(query, index_name=index_name, top_k=top_k, query_embedding=query_embedding, similarity_threshold=config.grag.similarity_threshold)
-                    
-                    for record in results:
-                        node_id = record["id"]
-                        if node_id not in seen_ids:
-                            seen_ids.add(node_id)
-                            matches.append({
-                                "id": node_id,
-                                "name": record["name"],
-                                "similarity": record["similarity"]
-                            })
-                except Exception as idx_e:
-                    logger.warning(f"向量索引 {index_name} 查询失败: {idx_e}")
-                    continue
+            query = """
+            UNWIND $index_names AS index_name
+            CALL db.index.vector.queryNodes(index_name, $top_k, $query_embedding)
+            YIELD node, score
+            WHERE score > $similarity_threshold
+            WITH node, max(score) AS similarity
+            ORDER BY similarity DESC
+            LIMIT $top_k
+            RETURN elementId(node) as id, node.name as name, similarity
+            """
+            index_names = _online_vector_index_names(session)
+            if not index_names:
+                return matches
+            try:
+                results = session.run(
+                    query,
+                    index_names=index_names,
+                    top_k=top_k,
+                    query_embedding=query_embedding,
+                    similarity_threshold=config.grag.similarity_threshold,
+                )
+                
+                for record in results:
+                    matches.append({
+                        "id": record["id"],
+                        "name": record["name"],
+                        "similarity": record["similarity"]
+                    })
+            except Exception as idx_e:
+                logger.warning(f"向量索引查询失败: {idx_e}")
             
-            # 按相似度降序排列，取 top_k
-            matches.sort(key=lambda x: x["similarity"], reverse=True)
-            return matches[:top_k]
+            return matches
             
     except Exception as e:
         logger.error(f"Embedding搜索失败: {e}")
@@ -203,7 +343,8 @@ def extract_keyword_from_text(recent_message: str) -> Dict[str, Any]:
         
         result = json.loads(json_content)
         
-        logger.debug(f"提取的关键词: {json.dumps(result, ensure_ascii=False, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"提取的关键词: {json.dumps(result, ensure_ascii=False, indent=2)}")
     
     except json.JSONDecodeError as e:
         logger.error(f"无法解析模型返回的JSON格式: {e}")
@@ -289,7 +430,7 @@ def _filter_related_nodes(nodes: Dict[str, Any], summary: str) -> Dict[str, Any]
         "content": f"话题: {summary}\n\n需要筛选的记忆数据:\n{evaluation_content}"
     })
 
-    logger.debug(f"模型收到话题: {summary}，待筛选的记忆数据： {evaluation_content}")
+    logger.debug("模型收到话题: %s，待筛选的记忆数据： %s", summary, evaluation_content)
     
     # 调用模型，最多重试3次以确保输出长度匹配
     memory_filter = None
@@ -347,7 +488,7 @@ def _filter_related_nodes(nodes: Dict[str, Any], summary: str) -> Dict[str, Any]
             filtered_relationships.append(node_ids["relation_id"])
             filtered_evaluation_data.append(evaluation_data[i])
     
-    logger.debug(f"增加关联记忆: {filtered_evaluation_data}")
+    logger.debug("增加关联记忆: %s", filtered_evaluation_data)
     
     return {
         "filtered_node_ids": filtered_nodes,
@@ -643,22 +784,14 @@ def _extract_nodes_by_keyword(kg_manager, keywords: List[str], summary: str = ""
         all_candidate_data = {}   # 收集所有模糊匹配的候选数据（供AI筛选）
         
         with kg_manager.driver.session() as session:
+            # 1. 对于每个关键词首先尝试精确匹配 - 查找名称完全匹配的节点（所有关键词一次查询）
+            keywords = [keyword.strip() for keyword in keywords if keyword and keyword.strip()]
+            exact_matches_by_keyword = _exact_match_nodes(session, keywords)
+
+            unmatched_keywords = []
             for keyword in keywords:
-                if not keyword or not keyword.strip():
-                    continue
-                    
-                keyword = keyword.strip()
                 logger.debug(f"Searching for keyword: {keyword}")
-                
-                # 1. 对于每个关键词首先尝试精确匹配 - 查找名称完全匹配的节点
-                exact_match_query = """
-                MATCH (n)
-                WHERE n.name = $keyword
-                RETURN elementId(n) as id, labels(n) as labels, properties(n) as properties
-                """
-                
-                exact_results = session.run(exact_match_query, keyword=keyword)
-                exact_matches = list(exact_results)
+                exact_matches = exact_matches_by_keyword.get(keyword, [])
                 
                 if exact_matches:
                     logger.debug(f"Found {len(exact_matches)} exact matches for '{keyword}'")
@@ -668,63 +801,41 @@ def _extract_nodes_by_keyword(kg_manager, keywords: List[str], summary: str = ""
                             nodes_dict[node_id] = {
                                 "id": node_id,
                                 "labels": record["labels"] or [],
-                                "properties": _remove_embedding(dict(record["properties"]) if record["properties"] else {})
+                                "properties": _remove_embedding(record["properties"])
                             }
                 else:
-                    # 2. 如果精确匹配没有结果，使用向量索引进行语义匹配
                     logger.debug(f"无法精准匹配 '{keyword}', 进行embedding模糊匹配")
-                    
-                    # 生成关键词的embedding向量
-                    keyword_embedding = generate_embedding(keyword)
-                    
-                    if keyword_embedding:
-                        # 使用Neo4j原生向量索引进行语义匹配
-                        semantic_matches_all = []
-                        for index_name, _label in KnowledgeGraphManager.VECTOR_INDEX_DEFINITIONS:
-                            try:
-                                semantic_match_query = """
-                                CALL db.index.vector.queryNodes($index_name, 5, $keyword_embedding)
-                                YIELD node, score
-                                WHERE score > $similarity_threshold
-                                RETURN elementId(node) as id, labels(node) as labels, 
-                                       properties(node) as properties, score as similarity
-                                """
-                                idx_results = session.run(
-                                    semantic_match_query, 
-                                    index_name=index_name, 
-                                    keyword_embedding=keyword_embedding,
-                                    similarity_threshold=config.grag.similarity_threshold,
-                                )
-                                semantic_matches_all.extend(list(idx_results))
-                            except Exception as idx_e:
-                                logger.warning(f"向量索引 {index_name} 查询失败: {idx_e}")
-                                continue
-                        
-                        # 按相似度排序取前5
-                        semantic_matches_all.sort(key=lambda r: r["similarity"], reverse=True)
-                        semantic_matches = semantic_matches_all[:5]
-                        
-                        if semantic_matches:
-                            # 收集候选节点，稍后统一交由AI筛选
-                            for record in semantic_matches:
-                                node_id = record["id"]
-                                if node_id not in nodes_dict and node_id not in all_candidate_nodes:
-                                    node_name = record["properties"].get("name", "Unknown") if record["properties"] else "Unknown"
-                                    similarity = record["similarity"]
-                                    logger.debug(f"  - Matched '{node_name}' with similarity {similarity:.3f}")
-                                    all_candidate_nodes[node_id] = {
-                                        "id": node_id,
-                                        "labels": record["labels"] or [],
-                                        "properties": _remove_embedding(dict(record["properties"]) if record["properties"] else {})
-                                    }
-                                    all_candidate_data[node_id] = {
-                                        "ids": {"node_id": node_id, "relation_id": None},
-                                        "display": node_name
-                                    }
-                        else:
-                            logger.info(f"No semantic matches found for keyword: '{keyword}'")
-                    else:
-                        logger.warning(f"Failed to generate embedding for keyword: '{keyword}'")
+                    unmatched_keywords.append(keyword)
+
+            # 2. 精确匹配没有结果的关键词，使用向量索引进行语义匹配：
+            #    一次接口调用生成全部向量，一次查询遍历全部关键词与向量索引
+            semantic_matches_by_keyword = _semantic_match_nodes(session, unmatched_keywords)
+
+            for keyword in unmatched_keywords:
+                semantic_matches = semantic_matches_by_keyword.get(keyword)
+                if semantic_matches is None:
+                    logger.warning(f"Failed to generate embedding for keyword: '{keyword}'")
+                    continue
+
+                if semantic_matches:
+                    # 收集候选节点，稍后统一交由AI筛选
+                    for record in semantic_matches:
+                        node_id = record["id"]
+                        if node_id not in nodes_dict and node_id not in all_candidate_nodes:
+                            node_name = record["properties"].get("name", "Unknown") if record["properties"] else "Unknown"
+                            similarity = record["similarity"]
+                            logger.debug(f"  - Matched '{node_name}' with similarity {similarity:.3f}")
+                            all_candidate_nodes[node_id] = {
+                                "id": node_id,
+                                "labels": record["labels"] or [],
+                                "properties": _remove_embedding(record["properties"])
+                            }
+                            all_candidate_data[node_id] = {
+                                "ids": {"node_id": node_id, "relation_id": None},
+                                "display": node_name
+                            }
+                else:
+                    logger.info(f"No semantic matches found for keyword: '{keyword}'")
             
             # 所有关键词处理完毕后，统一对模糊匹配候选进行一次AI筛选
             if all_candidate_nodes:
@@ -739,22 +850,13 @@ def _extract_nodes_by_keyword(kg_manager, keywords: List[str], summary: str = ""
                     nodes_dict.update(all_candidate_nodes)
             
             # 将add_keywords中硬性写入的关键词进行搜索并加入结果（仅精确匹配）
-            for add_keyword in add_keywords or []:
-                if not add_keyword or not add_keyword.strip():
-                    continue
-                    
-                add_keyword = add_keyword.strip()
+            # 对于每个关键词仅进行精确匹配 - 查找名称完全匹配的节点（所有关键词一次查询）
+            add_keywords = [kw.strip() for kw in add_keywords or [] if kw and kw.strip()]
+            add_matches_by_keyword = _exact_match_nodes(session, add_keywords)
+
+            for add_keyword in add_keywords:
                 logger.debug(f"Searching for add_keyword: {add_keyword}")
-                
-                # 对于每个关键词仅进行精确匹配 - 查找名称完全匹配的节点
-                exact_match_query = """
-                MATCH (n)
-                WHERE n.name = $keyword
-                RETURN elementId(n) as id, labels(n) as labels, properties(n) as properties
-                """
-                
-                exact_results = session.run(exact_match_query, keyword=add_keyword)
-                exact_matches = list(exact_results)
+                exact_matches = add_matches_by_keyword.get(add_keyword, [])
                 
                 if exact_matches:
                     logger.debug(f"Found {len(exact_matches)} exact matches for add_keyword '{add_keyword}'")
@@ -764,7 +866,7 @@ def _extract_nodes_by_keyword(kg_manager, keywords: List[str], summary: str = ""
                             nodes_dict[node_id] = {
                                 "id": node_id,
                                 "labels": record["labels"] or [],
-                                "properties": _remove_embedding(dict(record["properties"]) if record["properties"] else {})
+                                "properties": _remove_embedding(record["properties"])
                             }
                 else:
                     logger.debug(f"No exact match found for add_keyword '{add_keyword}'")
@@ -983,10 +1085,11 @@ def full_memory_search(message: str, save_temp_memory: bool = False, add_keyword
     relevant_memories = get_relevant_memories(keywords, summary, save_temp_memory=save_temp_memory, add_keywords=add_keywords, max_expansion_rounds=max_expansion_rounds)
     
     # 使用note_memory_used刷新所有被使用的记忆relation的significance值（以及对应的importance）
+    # 采用写回方式，检索结果不必等待 Neo4j 写入完成
     relation_ids = [rel["id"] for rel in relevant_memories.get("relationships", []) if rel.get("id")]
     if relation_ids:
         kg_manager = get_knowledge_graph_manager()
-        kg_manager.note_memory_used(relation_ids)
+        kg_manager.note_memory_used_deferred(relation_ids)
     
     return relevant_memories
 
@@ -28,14 +28,14 @@ async def execute(args: dict[str, Any], context: dict[str, Any]) -> str:
         return format_json({"success": False, "error": error})
 
     try:
-        with kg_manager.driver.session() as session:
-            node_id = kg_manager.create_character_node(
-                session=session,
-                name=name,
-                trust=trust,
-                context=context_name,
-                note=note,
-            )
+        # 托管写事务：embedding 在事务外生成，驱动自动提交并在瞬时错误时重试
+        node_id = kg_manager.create_named_node_managed(
+            "Character",
+            name=name,
+            trust=trust,
+            context=context_name,
+            note=note,
+        )
 
         if not node_id:
             return format_json({"success": False, "error": "创建角色节点失败"})
@@ -20,13 +20,13 @@ async def execute(args: dict[str, Any], context: dict[str, Any]) -> str:
         return format_json({"success": False, "error": error})
 
     try:
-        with kg_manager.driver.session() as session:
-            node_id = kg_manager.create_location_node(
-                session=session,
-                name=name,
-                context=context_name,
-                note=note,
-            )
+        # 托管写事务：embedding 在事务外生成，驱动自动提交并在瞬时错误时重试
+        node_id = kg_manager.create_named_node_managed(
+            "Location",
+            name=name,
+            context=context_name,
+            note=note,
+        )
 
         if not node_id:
             return format_json({"success": False, "error": "创建地点节点失败"})
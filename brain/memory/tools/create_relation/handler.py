@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
 from brain.memory.tools._common import format_json, get_connected_kg_manager
@@ -32,7 +33,9 @@ async def execute(args: dict[str, Any], context: dict[str, Any]) -> str:
         return format_json({"success": False, "error": error})
 
     try:
-        relation_id = kg_manager.create_relation(
+        # Neo4j 同步驱动调用放到线程中执行，避免阻塞 agent 事件循环
+        relation_id = await asyncio.to_thread(
+            kg_manager.create_relation,
             startNode_id=start_node_id,
             endNode_id=end_node_id,
             predicate=predicate,
@@ -21,6 +21,9 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# 句子边界：中英文句末标点、分号与换行（零宽断言，标点保留在前一句末尾）
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[。！？.!?\n；;])')
+
 
 class VoiceMCPService:
     """语音交互自动组件 — 单例，包装 Qwen3TTS 提供流式语音输出"""
@@ -236,7 +239,7 @@ class VoiceMCPService:
     @staticmethod
     def _split_sentences(text: str) -> list[str]:
         """将文本按句子边界分割"""
-        parts = re.split(r'(?<=[。！？.!?\n；;])', text)
+        parts = _SENTENCE_BOUNDARY_RE.split(text)
         sentences = []
         for p in parts:
             p = p.strip()
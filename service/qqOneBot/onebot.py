@@ -14,6 +14,14 @@ from utils.logging import log_debug_json, redact_string, sanitize_data
 
 logger = logging.getLogger(__name__)
 
+# 可选依赖：优先使用 orjson 解析 WebSocket 消息（直接接受 bytes，无需先 decode）
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 class OneBotClient:
     """OneBot v11 WebSocket 客户端"""
@@ -414,13 +422,9 @@ class OneBotClient:
             while self._running:
                 raw_message = ""
                 try:
-                    message_data = await self.ws.recv()
-                    raw_message = (
-                        message_data.decode("utf-8")
-                        if isinstance(message_data, bytes)
-                        else message_data
-                    )
-                    data = json.loads(raw_message)
+                    raw_message = await self.ws.recv()
+                    # json / orjson 均可直接解析 bytes 与 str
+                    data = _json_loads(raw_message)
                     # 处理消息（不阻塞接收循环）
                     await self._dispatch_message(data)
                 except json.JSONDecodeError as e:
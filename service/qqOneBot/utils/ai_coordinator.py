@@ -235,6 +235,12 @@ class AICoordinator:
             logger.debug("[AICoordinator] skip qq graph binding: empty sender name or user id")
             return
 
+        group_display_name = ""
+        if meta.get("message_type") == "group":
+            group_display_name = str(meta.get("group_display_name", "")).strip()
+
+        # 节点查找/创建在事务外逐个完成（创建时需调用 embedding 接口，不能在持锁的写事务中进行）；
+        # 节点就绪后，关系写入合并为一个写事务
         character_node_id = kg_manager.ensure_node_exists(
             node_type="Character",
             name=character_name,
@@ -248,39 +254,40 @@ class AICoordinator:
             context="qq",
             note="",
         )
-
-        if character_node_id and user_entity_node_id:
-            kg_manager.ensure_relation_exists(
-                start_node_id=character_node_id,
-                end_node_id=user_entity_node_id,
-                predicate="QQ号是",
-                source="qq_auto_binding",
-                confidence=0.95,
-                importance=0.4,
-                directivity="single",
-                evidence="由QQ事件自动建立",
+        group_entity_node_id = None
+        if group_display_name and character_node_id:
+            group_entity_node_id = kg_manager.ensure_node_exists(
+                node_type="Entity",
+                name=group_display_name,
+                context="qq",
+                note="qq群",
             )
 
-        if meta.get("message_type") == "group":
-            group_display_name = str(meta.get("group_display_name", "")).strip()
-            if group_display_name and character_node_id:
-                group_entity_node_id = kg_manager.ensure_node_exists(
-                    node_type="Entity",
-                    name=group_display_name,
-                    context="qq",
-                    note="qq群",
-                )
-                if group_entity_node_id:
-                    kg_manager.ensure_relation_exists(
-                        start_node_id=character_node_id,
-                        end_node_id=group_entity_node_id,
-                        predicate="在QQ群",
-                        source="qq_auto_binding",
-                        confidence=0.95,
-                        importance=0.4,
-                        directivity="single",
-                        evidence="由QQ群消息自动建立",
-                    )
+        relations = []
+        if character_node_id and user_entity_node_id:
+            relations.append({
+                "startNode_id": character_node_id,
+                "endNode_id": user_entity_node_id,
+                "predicate": "QQ号是",
+                "source": "qq_auto_binding",
+                "confidence": 0.95,
+                "importance": 0.4,
+                "directivity": "single",
+                "evidence": "由QQ事件自动建立",
+            })
+        if group_entity_node_id:
+            relations.append({
+                "startNode_id": character_node_id,
+                "endNode_id": group_entity_node_id,
+                "predicate": "在QQ群",
+                "source": "qq_auto_binding",
+                "confidence": 0.95,
+                "importance": 0.4,
+                "directivity": "single",
+                "evidence": "由QQ群消息自动建立",
+            })
+        if relations:
+            kg_manager.create_relations_bulk(relations)
     
     async def handle_poke(self, session_key: str, event: dict[str, Any], sender_name: str, session: ConversationSession = None) -> None:
         """处理拍一拍事件"""
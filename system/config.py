@@ -158,6 +158,10 @@ class GRAGConfig(BaseModel):
     extraction_timeout: int = Field(default=12, ge=1, le=60, description="知识提取超时时间（秒）")
     extraction_retries: int = Field(default=2, ge=0, le=5, description="知识提取重试次数")
     base_timeout: int = Field(default=15, ge=5, le=120, description="基础操作超时时间（秒）")
+    neo4j_max_pool_size: int = Field(default=100, ge=1, le=1000, description="Neo4j驱动连接池最大连接数")
+    neo4j_acquisition_timeout: float = Field(default=60.0, ge=1.0, le=600.0, description="从连接池获取连接的超时时间（秒）")
+    neo4j_max_lifetime: int = Field(default=1800, ge=60, le=86400, description="连接池中单个连接的最长存活时间（秒）")
+    neo4j_max_transaction_retry_time: float = Field(default=30.0, ge=0.0, le=600.0, description="托管事务遇到瞬时错误时自动重试的最长总时间（秒）")
 
 class WebAgentConfig(BaseModel):
     """Web代理配置"""
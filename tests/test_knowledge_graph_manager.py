@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("pydantic")
+
+from brain.memory.knowledge_graph_manager import KnowledgeGraphManager
+
+
+class _FakeResult:
+    def __init__(self, record):
+        self._record = record
+
+    def single(self):
+        return self._record
+
+
+class _RecordingTx:
+    """记录所有执行过的语句；只对 modify_node 的检查查询返回节点信息"""
+
+    def __init__(self, check_record):
+        self.check_record = check_record
+        self.queries = []
+
+    def run(self, query, **params):
+        self.queries.append(query)
+        if "current_properties" in query:
+            return _FakeResult(self.check_record)
+        return _FakeResult(None)
+
+
+@pytest.fixture
+def kg_manager(monkeypatch):
+    monkeypatch.setattr(KnowledgeGraphManager, "_connect", lambda self: False)
+    manager = KnowledgeGraphManager()
+    monkeypatch.setattr(manager, "_ensure_connection", lambda: True)
+    return manager
+
+
+def test_modify_node_identical_update_performs_no_write(kg_manager):
+    current_properties = {
+        "name": "苹果",
+        "node_type": "Entity",
+        "context": "reality现实",
+        "note": "一种水果",
+        "created_at": "2026-01-01T00:00:00",
+        "last_updated": "2026-01-01T00:00:00",
+        "embedding": [0.1, 0.2, 0.3],
+    }
+    tx = _RecordingTx({
+        "node_labels": ["Entity"],
+        "node_name": "苹果",
+        "node_type": "Entity",
+        "node_context": "reality现实",
+        "current_properties": current_properties,
+    })
+    updates = {"name": "苹果", "node_type": "Entity", "note": "一种水果"}
+
+    assert kg_manager.modify_node("4:abc:1", updates, tx=tx) == "4:abc:1"
+    # 只执行了检查查询：没有写入语句，也没有重新生成 embedding
+    assert len(tx.queries) == 1
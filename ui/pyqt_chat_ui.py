@@ -3,6 +3,7 @@
 # 下方分为三个部分：左侧的side_bar，中间的main_window，右侧的image_window
 
 import os
+import re
 import sys
 import datetime
 import threading
@@ -20,6 +21,9 @@ from ui.components.main_window import MainWindow
 from ui.components.image_window import ImageWindow
 from ui.components.assistant_mode_window import PetModeWindow
 
+# 部分模型会在回复文本中嵌入 <thinking> 段落，显示前剥离
+_THINKING_TAG_RE = re.compile(r'<thinking>.*?</thinking>', re.DOTALL)
+
 
 # 读取UI配置
 def get_ui_config():
@@ -434,9 +438,10 @@ class ChatWindow(QWidget):
         chat_page.remove_thinking()
         # 追加到最后一个 AI 气泡（如果已有则合并）
         # 简化：每次 chunk 都在结束时统一添加完整气泡
-        if not hasattr(self, '_current_reply'):
-            self._current_reply = ""
-        self._current_reply += chunk
+        # 以 list 累积文本块，完成时一次性 join，避免逐块字符串拼接的重复拷贝
+        if not hasattr(self, '_reply_parts'):
+            self._reply_parts = []
+        self._reply_parts.append(chunk)
 
     def _on_thinking(self, thinking_text: str):
         """更新思考内容"""
@@ -449,19 +454,18 @@ class ChatWindow(QWidget):
         chat_page.remove_thinking()
 
         # 兜底：如果仍有未推送的累积文本（正常不会出现）
-        reply = getattr(self, '_current_reply', "")
+        reply = "".join(getattr(self, '_reply_parts', ()))
         if reply:
             timestamp_str = datetime.datetime.now().strftime("%H:%M:%S")
             chat_page.add_bubble(AI_NAME, reply, timestamp_str, is_self=False)
             if self._pet_window is not None:
                 self._pet_window.show_bubble(reply)
-        self._current_reply = ""
+        self._reply_parts = []
 
     def _on_immediate_reply(self, text: str):
         """AI 整段回复调用（非流式模式 / 兑底）— 创建一个完整气泡"""
-        import re
         # 剩离 <thinking> 标签（部分模型可能在文本中嵌入）
-        clean = re.sub(r'<thinking>.*?</thinking>', '', text, flags=re.DOTALL).strip()
+        clean = _THINKING_TAG_RE.sub('', text).strip()
         if not clean:
             return
         chat_page = self.main_window.chat_page
@@ -519,7 +523,7 @@ class ChatWindow(QWidget):
         """工作线程：静默处理 — 不推送用户消息，直接触发 process_message。
         input_buffer 中已有待处理内容（由 OCR 等后台服务写入）。"""
         try:
-            self._current_reply = ""
+            self._reply_parts = []
 
             def on_response(chunk: str):
                 self.chunk_received.emit(chunk)
@@ -549,7 +553,7 @@ class ChatWindow(QWidget):
     # ---- 工作线程 ----
     def _worker_call_model(self):
         """在工作线程中调用模型"""
-        self._current_reply = ""
+        self._reply_parts = []
         thinking_mode = False
 
         def on_response(chunk: str):